@@ -1,4 +1,5 @@
 from .game import ArkanoidGame
 from .arkanoid import ArkanoidGameAI, Direction
+from .arkanoid_env import ArkanoidEnv
 
-__all__ = [ArkanoidGame, ArkanoidGameAI, Direction]
+__all__ = ['ArkanoidGame', 'ArkanoidGameAI', 'Direction', 'ArkanoidEnv']
@@ -1,127 +1,49 @@
-import torch
-import random
-import numpy as np
-from collections import deque
-from arkanoid import ArkanoidGameAI, Direction
-from model import Linear_QNet, QTrainer
-from helper import plot
+from rl_core import agent as core
+from rl_core.trajectory import replay_trajectories, read_header
+from .arkanoid import ArkanoidGameAI
+from .arkanoid_env import extract_state, STATE_SIZE
 
-MAX_MEMORY = 100_000
-BATCH_SIZE = 1000
-LR = 0.001
 
+class Agent(core.Agent):
 
-class Agent:
+    def __init__(self, prioritized=False, inference='numpy', packed=False, memory_size=None, seed=None):
+        super().__init__(STATE_SIZE, 2, 70, prioritized, inference, packed, memory_size, seed)
 
-    def __init__(self):
-        self.n_games = 0
-        self.epsilon = 0
-        self.gamma = 0.9
-        self.memory = deque(maxlen=MAX_MEMORY)
-        self.model = Linear_QNet(1, 256, 2)
-        self.trainer = QTrainer(self.model, lr=LR, gamma=self.gamma)
+    # the module function itself, one call less per step
+    get_state = staticmethod(extract_state)
 
-    def get_state(self, game):
-        racket = game.racket
-        ball = game.ball
-        ball_speed_y = game.ball_speed_y
-        ball_speed_x = game.ball_speed_x
 
-        dir_l = game.direction == Direction.LEFT
-        dir_r = game.direction == Direction.RIGHT
-
-        state = [
-            racket.x1 >= ball.x0 >= racket.x0
-        ]
-
-        # state = [
-        #     # not danger
-        #     ball_speed_y < 0,
-        #     (ball_speed_y > 0) and (racket.x1 >= ball.x0 >= racket.x0),
-        #
-        #     # danger
-        #     (ball_speed_y > 0) and not (racket.x1 >= ball.x0 >= racket.x0),
-        #
-        #     (ball.x0 > racket.x1),
-        #     (racket.x0 > ball.x0),
-        #
-        #     ball_speed_x > 0,
-        #     ball_speed_x < 0,
-        #
-        #     # Move direction
-        #     dir_l,
-        #     dir_r,
-        #     game.ball_motion
-        # ]
-        return np.array(state, dtype=int)
-
-    def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))  # popleft if MAX_MEMORY is reached
-
-    def train_long_memory(self):
-        if len(self.memory) > BATCH_SIZE:
-            mini_sample = random.sample(self.memory, BATCH_SIZE)  # list of tuples
-        else:
-            mini_sample = self.memory
-
-        states, actions, rewards, next_states, dones = zip(*mini_sample)
-        self.trainer.train_step(states, actions, rewards, next_states, dones)
-
-    def train_short_memory(self, state, action, reward, next_state, done):
-        self.trainer.train_step(state, action, reward, next_state, done)
-
-    def get_action(self, state):
-        # random moves: tradeoff exploration / exploitation
-        self.epsilon = 70 - self.n_games
-        final_move = [0, 0]
-        if random.randint(0, 200) < self.epsilon:
-            move = random.randint(0, 1)
-            final_move[move] = 1
-        else:
-            state0 = torch.tensor(state, dtype=torch.float)
-            prediction = self.model(state0)
-            move = torch.argmax(prediction).item()
-            final_move[move] = 1
-        return final_move
-
-
-def train():
-    plot_scores = []
-    plot_mean_scores = []
-    total_score = 0
-    record = 0
-    agent = Agent()
-    game = ArkanoidGameAI()
-    while True:
-        # get old state
-        state_old = agent.get_state(game)
-        # get move
-        final_move = agent.get_action(state_old)
-        # perform move and get new state
-        reward, done, score = game.play_step(final_move)
-        state_new = agent.get_state(game)
-
-        agent.train_short_memory(state_old, final_move, reward, state_new, done)
-        agent.remember(state_old, final_move, reward, state_new, done)
-
-        if done:
-            # train long memory
-            game.reset()
-            agent.n_games += 1
-            agent.train_long_memory()
-
-            if score > record:
-                record = score
-                agent.model.save()
-
-            print('Game', agent.n_games, 'Score', score, 'Record:', record)
-
-            plot_scores.append(score)
-            total_score += score
-            mean_score = total_score / agent.n_games
-            plot_mean_scores.append(mean_score)
-            plot(plot_scores, plot_mean_scores)
+def train(prioritized=False, plot=True, run_name=None, resume=False, max_games=None,
+          timing=True, profile_games=None, inference='numpy', packed_replay=False, memory_size=None,
+          headless=False, seed=None, trajectory=None, train_every=None, gradient_steps=1,
+          batch_size=core.BATCH_SIZE, background_learner=False,
+          async_learner=False, publish_every=core.PUBLISH_EVERY, max_updates_per_step=None):
+    # seed: one seed for the whole run, the game gets its own stream
+    agent = Agent(prioritized=prioritized, inference=inference, packed=packed_replay, memory_size=memory_size,
+                  seed=seed)
+    game = ArkanoidGameAI(headless=headless, seed=None if seed is None else seed + 1)
+    core.train(agent, game, plot=plot, run_name=run_name, resume=resume, max_games=max_games, timing=timing,
+               profile_games=profile_games, trajectory=trajectory, train_every=train_every,
+               gradient_steps=gradient_steps, batch_size=batch_size, background_learner=background_learner,
+               async_learner=async_learner, publish_every=publish_every, max_updates_per_step=max_updates_per_step)
 
 
 if __name__ == '__main__':
-    train()
+    # python -m arkanoid.agent
+    parser = core.make_parser()
+    parser.add_argument('--inference', choices=('numpy', 'torch', 'script'), default='numpy',
+                        help='how greedy moves are computed')
+    args = parser.parse_args()
+    if args.replay:
+        # the board size the trajectory was recorded on
+        _, w, h = read_header(args.replay)
+        print(replay_trajectories(args.replay, ArkanoidGameAI(w, h, headless=True), 2))
+    else:
+        train(prioritized=args.prioritized, plot=not args.no_plot, run_name=args.run_name, resume=args.resume,
+              timing=not args.no_timing, profile_games=args.profile_games, inference=args.inference,
+              packed_replay=args.packed_replay, memory_size=args.memory_size, headless=args.headless,
+              seed=args.seed, trajectory=args.trajectory, train_every=args.train_every,
+              gradient_steps=args.gradient_steps, batch_size=args.batch_size,
+              background_learner=args.background_learner,
+              async_learner=args.async_learner, publish_every=args.publish_every,
+              max_updates_per_step=args.max_updates_per_step)
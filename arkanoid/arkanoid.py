@@ -1,4 +1,5 @@
 import pygame
+import zlib
 import random
 from enum import Enum
 from collections import namedtuple
@@ -39,12 +40,17 @@ SPEED = 150
 
 class ArkanoidGameAI:
 
-    def __init__(self, w=480, h=480):
+    def __init__(self, w=480, h=480, headless=False, seed=None):
+        # headless: no window, no event polling, no rendering and no frame limit
+        # seed: seeds the generator of episode seeds, None - seeded from the OS
         self.w = w
         self.h = h
-        self.display = pygame.display.set_mode((self.w, self.h))
-        pygame.display.set_caption('Arkanoid game')
-        self.clock = pygame.time.Clock()
+        self.headless = headless
+        self.seeds = random.Random(seed)
+        if not self.headless:
+            self.display = pygame.display.set_mode((self.w, self.h))
+            pygame.display.set_caption('Arkanoid game')
+            self.clock = pygame.time.Clock()
 
         self.blocks = []
         self.block_size = BLOCK_SIZE * 2
@@ -56,7 +62,10 @@ class ArkanoidGameAI:
         self.racket_size = 90
         self.reset()
 
-    def reset(self):
+    def reset(self, seed=None):
+        # every episode draws from its own generator, so (episode_seed, actions) replays it exactly
+        self.episode_seed = self.seeds.getrandbits(32) if seed is None else seed
+        self.rng = random.Random(self.episode_seed)
         self.direction = Direction.RIGHT
         self.racket = Point((self.w / 2) - self.racket_size / 2, (self.w / 2) + self.racket_size / 2,
               self.h - 30 - BLOCK_SIZE, self.h - 30)
@@ -85,24 +94,30 @@ class ArkanoidGameAI:
             current_x_position = self.edge_space_size
             while current_x_position < self.w - GOAL_BLOCK_SIZE - SPACE_BETWEEN_BLOCKS:
                 self.blocks.append(PointBlocks(current_x_position, current_x_position + GOAL_BLOCK_SIZE,
-                                         current_y_position, current_y_position + BLOCK_SIZE, random.randint(1,1)))
+                                         current_y_position, current_y_position + BLOCK_SIZE, self.rng.randint(1,1)))
                 current_x_position += GOAL_BLOCK_SIZE + SPACE_BETWEEN_BLOCKS
 
         for i in range(0):
-            x = random.randint(0, self.row_block_count - 1)
-            y = random.randint(0, 5)
+            x = self.rng.randint(0, self.row_block_count - 1)
+            y = self.rng.randint(0, 5)
             item = PointBlocks(self.edge_space_size + x * (GOAL_BLOCK_SIZE + SPACE_BETWEEN_BLOCKS),
                          self.edge_space_size + x * (GOAL_BLOCK_SIZE + SPACE_BETWEEN_BLOCKS) + GOAL_BLOCK_SIZE,
-                         y * (BLOCK_SIZE + SPACE_BETWEEN_BLOCKS), y * (BLOCK_SIZE + SPACE_BETWEEN_BLOCKS) + BLOCK_SIZE, random.randint(1,1))
+                         y * (BLOCK_SIZE + SPACE_BETWEEN_BLOCKS), y * (BLOCK_SIZE + SPACE_BETWEEN_BLOCKS) + BLOCK_SIZE, self.rng.randint(1,1))
             if item not in self.blocks:
                 self.blocks.append(item)
 
+    def digest(self):
+        # checksum of the game state, a replay compares it to check that it reached exactly the recorded state
+        return zlib.crc32(repr((self.racket, self.ball, self.ball_speed_x, self.ball_speed_y, self.blocks,
+                                self.score)).encode())
+
     def play_step(self, action):
         self.frame_iteration += 1
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                quit()
+        if not self.headless:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    quit()
 
         self.reward = 0
         self._move(action)
@@ -115,8 +130,9 @@ class ArkanoidGameAI:
         #     game_over = True
         #     self.reward += 30
 
-        self._update_ui()
-        self.clock.tick(SPEED)
+        if not self.headless:
+            self._update_ui()
+            self.clock.tick(SPEED)
         return self.reward, game_over, self.score
 
     def _move(self, action):
@@ -169,7 +185,7 @@ class ArkanoidGameAI:
         if self.ball_motion is False:
             self.ball_motion = True
             self.ball_speed_x = self.generate_x_speed()
-            self.ball_speed_y = random.randint(-3, -3)
+            self.ball_speed_y = self.rng.randint(-3, -3)
 
         game_over = False
         if self.ball_motion is True:
@@ -181,7 +197,7 @@ class ArkanoidGameAI:
         return game_over
 
     def generate_x_speed(self):
-        x_speed = random.randint(-4, 4)
+        x_speed = self.rng.randint(-4, 4)
         if x_speed == 0:
             return self.generate_x_speed()
         return x_speed
@@ -294,7 +310,7 @@ class ArkanoidGameAI:
         if is_racket is True:
             self.ball_speed_y *= (-1)
             if self.ball_speed_x > 0 and coefficient < 0.5 or self.ball_speed_x < 0 and coefficient >= 0.5:
-                r = random.randint(-40, 40)
+                r = self.rng.randint(-40, 40)
                 self.ball_speed_x *= (-1) * abs((100 + r) / 100)
 
     def _update_ui(self):
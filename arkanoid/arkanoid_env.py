@@ -0,0 +1,58 @@
+import numpy as np
+from rl_core.env import GameEnv, Box, SyncVectorEnv, AsyncVectorEnv
+from .arkanoid import ArkanoidGameAI, Direction
+
+STATE_SIZE = 1
+
+
+def extract_state(game):
+    # the features Agent.get_state and ArkanoidEnv observe
+    racket = game.racket
+    ball = game.ball
+    ball_speed_y = game.ball_speed_y
+    ball_speed_x = game.ball_speed_x
+
+    dir_l = game.direction == Direction.LEFT
+    dir_r = game.direction == Direction.RIGHT
+
+    state = [
+        racket.x1 >= ball.x0 >= racket.x0
+    ]
+
+    # state = [
+    #     # not danger
+    #     ball_speed_y < 0,
+    #     (ball_speed_y > 0) and (racket.x1 >= ball.x0 >= racket.x0),
+    #
+    #     # danger
+    #     (ball_speed_y > 0) and not (racket.x1 >= ball.x0 >= racket.x0),
+    #
+    #     (ball.x0 > racket.x1),
+    #     (racket.x0 > ball.x0),
+    #
+    #     ball_speed_x > 0,
+    #     ball_speed_x < 0,
+    #
+    #     # Move direction
+    #     dir_l,
+    #     dir_r,
+    #     game.ball_motion
+    # ]
+    return np.array(state, dtype=int)
+
+
+class ArkanoidEnv(GameEnv):
+    # actions: 0 keep the racket direction, 1 reverse it, as in Agent.get_action
+
+    def __init__(self, w=480, h=480, seed=None, headless=True, max_episode_steps=None):
+        game = ArkanoidGameAI(w, h, headless=headless, seed=seed)
+        super().__init__(game, Box(0, 1, (STATE_SIZE,), 'int64'), 2, max_episode_steps)
+
+    def observe(self):
+        return extract_state(self.game)
+
+
+def make_vector_env(n_envs, asynchronous=False, n_workers=None, **kwargs):
+    # n_envs ArkanoidEnv(**kwargs); seeds come from reset(seed)
+    env_fns = [lambda: ArkanoidEnv(**kwargs)] * n_envs
+    return AsyncVectorEnv(env_fns, n_workers) if asynchronous else SyncVectorEnv(env_fns)
@@ -0,0 +1,83 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = os.path.join(ROOT, 'benchmarks')
+BASELINE = os.path.join(BENCHMARKS, 'baseline.json')
+
+# every game runs in its own interpreter, so one suite's threads and imports do not skew the other
+SUITES = {
+    'snake': 'bench_snake.py',
+    'arkanoid': 'bench_arkanoid.py',
+}
+
+
+def run_suite(name):
+    script = SUITES[name]
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.setdefault('SDL_VIDEODRIVER', 'dummy')
+    env.setdefault('MPLBACKEND', 'Agg')
+    # run from a scratch folder so train() does not leave model/, metrics/ and checkpoint/ in the repo
+    with tempfile.TemporaryDirectory() as cwd:
+        out = subprocess.run([sys.executable, os.path.join(BENCHMARKS, script)], cwd=cwd, env=env,
+                             stdout=subprocess.PIPE, check=True, text=True).stdout
+    results = json.loads(out.strip().splitlines()[-1])
+    return {f'{name}.{metric}': value for metric, value in results.items()}
+
+
+def compare(results, baseline, tolerance):
+    # *_per_sec metrics should not drop, *_ms metrics should not grow, by more than tolerance
+    regressions = []
+    for metric, value in results.items():
+        if metric not in baseline:
+            print(f'{metric:>45} {value:>14.4f}')
+            continue
+        base = baseline[metric]
+        change = (value - base) / base
+        worse = -change if metric.endswith('_per_sec') else change
+        flag = 'REGRESSION' if worse > tolerance else ''
+        print(f'{metric:>45} {value:>14.4f} {base:>14.4f} {change:>+8.1%} {flag}')
+        if flag:
+            regressions.append(metric)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('suites', nargs='*', default=list(SUITES), help='subset of: ' + ', '.join(SUITES))
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', default=BASELINE, help='results to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='relative slowdown reported as regression')
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.suites:
+        results.update(run_suite(name))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print('Baseline saved to', args.baseline)
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print('Regressions:', ', '.join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
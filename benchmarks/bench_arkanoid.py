@@ -0,0 +1,66 @@
+import os
+import numpy as np
+import torch
+from common import per_sec, latency_ms, report
+from rl_core.model import Linear_QNet, QTrainer
+from rl_core.replay import ReplayBuffer
+from arkanoid.arkanoid import ArkanoidGameAI
+from arkanoid.agent import Agent
+
+
+def bench_env():
+    game = ArkanoidGameAI(headless=True)
+    moves = np.eye(2, dtype=int)[np.random.randint(0, 2, 10_000)].tolist()
+    step = 0
+
+    def play_step():
+        nonlocal step
+        step += 1
+        if game.play_step(moves[step % len(moves)])[1]:
+            game.reset()
+
+    # ball resting on the racket: the racket test misses and the loop over blocks runs in full
+    game.reset()
+    return {
+        'is_other_subject_per_sec': per_sec(lambda: game.is_other_subject(game.ball)),
+        'env_steps_per_sec': per_sec(play_step),
+    }
+
+
+def bench_features():
+    agent = Agent()
+    game = ArkanoidGameAI(headless=True)
+    return {'get_state_per_sec': per_sec(lambda: agent.get_state(game))}
+
+
+def bench_train_step():
+    results = {}
+    trainer = QTrainer(Linear_QNet(1, 256, 2), lr=0.001, gamma=0.9)
+    for batch_size in (1, 32, 1000):
+        states = np.random.randint(0, 2, (batch_size, 1))
+        actions = np.eye(2, dtype=int)[np.random.randint(0, 2, batch_size)]
+        rewards = np.random.choice([-10, 0, 10], batch_size)
+        next_states = np.random.randint(0, 2, (batch_size, 1))
+        dones = np.random.rand(batch_size) < 0.1
+        if batch_size == 1:
+            args = (states[0], actions[0].tolist(), int(rewards[0]), next_states[0], bool(dones[0]))
+        else:
+            args = tuple(torch.from_numpy(a) for a in (states, actions, rewards, next_states, dones))
+        results[f'train_step_{batch_size}_ms'] = latency_ms(lambda: trainer.train_step(*args))
+    return results
+
+
+def bench_replay():
+    buffer = ReplayBuffer(100_000, 1, 2)
+    for _ in range(buffer.capacity):
+        buffer.push(np.random.randint(0, 2, 1), [1, 0], 0, np.random.randint(0, 2, 1), False)
+    return {'replay_sample_uniform_ms': latency_ms(lambda: buffer.sample(1000))}
+
+
+if __name__ == '__main__':
+    np.random.seed(0)
+    torch.set_num_threads(int(os.environ.get('BENCH_THREADS', 1)))
+    results = {}
+    for bench in (bench_env, bench_features, bench_train_step, bench_replay):
+        results.update(bench())
+    report(results)
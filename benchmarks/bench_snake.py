@@ -0,0 +1,148 @@
+import os
+import time
+import itertools
+import numpy as np
+import torch
+from common import per_sec, latency_ms, report
+from rl_core import agent as core
+from rl_core.model import Linear_QNet, QTrainer, InferencePolicy, TablePolicy
+from rl_core.inference_server import InferenceServer, InferenceClient
+from rl_core.replay import ReplayBuffer, PrioritizedReplayBuffer, PackedReplayBuffer
+from snake_RL.snake import SnakeGameAI
+from snake_RL.agent import Agent
+from snake_RL import agent as agent_module
+from snake_RL.vector_snake import VectorSnakeEnv
+from snake_RL.snake_env import make_vector_env
+from snake_RL.features import extract_states, valid_states
+
+N_ENVS = 1024  # boards in the batched env and feature benchmarks
+GAME_ENVS = 64  # SnakeEnv instances in the sync and async vector env benchmarks
+TRAIN_GAMES = 30  # games played by the end to end benchmark
+
+
+def _random_moves(n):
+    moves = np.zeros((n, 3), dtype=int)
+    moves[np.arange(n), np.random.choice(3, n, p=[0.8, 0.1, 0.1])] = 1
+    return moves.tolist()
+
+
+def bench_env():
+    game = SnakeGameAI(headless=True)
+    moves = _random_moves(10_000)
+    step = 0
+
+    def play_step():
+        nonlocal step
+        step += 1
+        if game.play_step(moves[step % len(moves)])[1]:
+            game.reset()
+
+    env = VectorSnakeEnv(N_ENVS)
+    actions = itertools.cycle(np.random.randint(0, 3, (100, N_ENVS)))
+    results = {
+        'env_steps_per_sec': per_sec(play_step),
+        'vector_env_steps_per_sec': per_sec(lambda: env.step(next(actions)), N_ENVS),
+    }
+    game_actions = itertools.cycle(np.random.randint(0, 3, (100, GAME_ENVS)))
+    for name, envs in (('sync', make_vector_env(GAME_ENVS)), ('async', make_vector_env(GAME_ENVS, True, 2))):
+        envs.reset(seed=0)
+        results[f'{name}_vector_env_steps_per_sec'] = per_sec(lambda: envs.step(next(game_actions)), GAME_ENVS)
+        envs.close()
+    return results
+
+
+def bench_features():
+    agent = Agent()
+    game = SnakeGameAI(headless=True)
+    for move in _random_moves(20):
+        game.play_step(move)
+
+    env = VectorSnakeEnv(N_ENVS)
+    for actions in np.random.randint(0, 3, (20, N_ENVS)):
+        env.step(actions)
+    return {
+        'get_state_per_sec': per_sec(lambda: agent.get_state(game)),
+        'extract_states_per_sec': per_sec(lambda: extract_states(env.heads, env.directions, env.foods, env.occupancy),
+                                          N_ENVS),
+    }
+
+
+def bench_train_step():
+    results = {}
+    trainer = QTrainer(Linear_QNet(13, 256, 3), lr=0.001, gamma=0.9)
+    for batch_size in (1, 32, 1000):
+        states = np.random.randint(0, 2, (batch_size, 13))
+        actions = np.eye(3, dtype=int)[np.random.randint(0, 3, batch_size)]
+        rewards = np.random.choice([-10, 0, 10], batch_size)
+        next_states = np.random.randint(0, 2, (batch_size, 13))
+        dones = np.random.rand(batch_size) < 0.1
+        if batch_size == 1:
+            # the per-step train_short_memory call
+            args = (states[0], actions[0].tolist(), int(rewards[0]), next_states[0], bool(dones[0]))
+        else:
+            args = tuple(torch.from_numpy(a) for a in (states, actions, rewards, next_states, dones))
+        results[f'train_step_{batch_size}_ms'] = latency_ms(lambda: trainer.train_step(*args))
+    return results
+
+
+def bench_inference():
+    # greedy decision latency of every InferencePolicy backend
+    model = Linear_QNet(13, 256, 3)
+    state = valid_states()[np.random.randint(288)]
+    results = {f'get_action_{backend}_ms': latency_ms(lambda: policy.act(state))
+               for backend, policy in ((b, InferencePolicy(model, b)) for b in ('numpy', 'torch', 'script'))}
+    table = TablePolicy(model, valid_states())
+    results['get_action_table_ms'] = latency_ms(lambda: table.act(state))
+    results['table_refresh_ms'] = latency_ms(table.refresh)
+    return results
+
+
+def bench_inference_server():
+    # greedy decisions for GAME_ENVS envs per round: one batched pass in-process, GAME_ENVS single-state requests
+    # batched by the serving thread, and one batch over the Unix socket
+    model = Linear_QNet(13, 256, 3)
+    states = valid_states()[np.random.randint(288, size=GAME_ENVS)].astype(np.float32)
+    server = InferenceServer(model, max_batch=GAME_ENVS)
+    path = os.path.join(os.getcwd(), 'inference.sock')
+    server.serve(path)
+    client = InferenceClient(path, 13)
+    results = {
+        'server_batch_decisions_per_sec': per_sec(lambda: server.act_batch(states), GAME_ENVS),
+        'server_queue_decisions_per_sec': per_sec(
+            lambda: [request.result() for request in [server.submit(state) for state in states]], GAME_ENVS),
+        'server_socket_decisions_per_sec': per_sec(lambda: client.act_batch(states), GAME_ENVS),
+    }
+    client.close()
+    server.close()
+    return results
+
+
+def bench_replay():
+    results = {}
+    buffers = {'uniform': ReplayBuffer(100_000, 13, 3), 'prioritized': PrioritizedReplayBuffer(100_000, 13, 3),
+               'packed': PackedReplayBuffer(100_000, 13, 3)}
+    for name, buffer in buffers.items():
+        for _ in range(buffer.capacity):
+            buffer.push(np.random.randint(0, 2, 13), [1, 0, 0], 0, np.random.randint(0, 2, 13), False)
+        results[f'replay_push_{name}_per_sec'] = per_sec(
+            lambda: buffer.push(np.zeros(13), [1, 0, 0], 0, np.zeros(13), False))
+        results[f'replay_sample_{name}_ms'] = latency_ms(lambda: buffer.sample(1000))
+    return results
+
+
+def bench_train():
+    # end to end: train() headless, without plot, for TRAIN_GAMES games; writes into the current folder
+    core.print = lambda *args: None
+    start = time.perf_counter()
+    agent_module.train(headless=True, plot=False, run_name='benchmark', max_games=TRAIN_GAMES, seed=0)
+    return {'train_games_per_sec': TRAIN_GAMES / (time.perf_counter() - start)}
+
+
+if __name__ == '__main__':
+    np.random.seed(0)
+    torch.set_num_threads(int(os.environ.get('BENCH_THREADS', 1)))
+    results = {}
+    for bench in (bench_env, bench_features, bench_train_step, bench_inference, bench_inference_server, bench_replay,
+                  bench_train):
+        results.update(bench())
+    report(results)
@@ -0,0 +1,44 @@
+import sys
+import json
+import time
+
+MIN_TIME = 0.5  # seconds every measurement runs for at least
+REPEATS = 3  # best of
+
+
+def _best_time(fn, number):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _calibrate(fn):
+    # number of calls that takes at least MIN_TIME
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= MIN_TIME:
+            return number
+        number *= 2
+
+
+def per_sec(fn, items=1):
+    # fn() handles `items` things per call (env steps, states, ...), returns things per second
+    number = _calibrate(fn)
+    return number * items / _best_time(fn, number)
+
+
+def latency_ms(fn):
+    number = _calibrate(fn)
+    return _best_time(fn, number) / number * 1000
+
+
+def report(results):
+    # bench scripts print their results as one JSON line on stdout, read by python -m benchmarks
+    sys.stdout.write(json.dumps(results) + '\n')
@@ -0,0 +1,3 @@
+# the DQN parts shared by snake_RL and arkanoid: a game subclasses agent.Agent and calls agent.train
+# nothing is imported here, so `python -m rl_core.<module>` tools and light submodules (env, metrics) do not load
+# the training stack; import from the submodules, e.g. from rl_core.agent import Agent
@@ -0,0 +1,248 @@
+import time
+import argparse
+import random
+from contextlib import nullcontext
+import numpy as np
+import torch
+from .model import Linear_QNet, QTrainer, InferencePolicy, TablePolicy
+from .replay import ReplayBuffer, PrioritizedReplayBuffer, PackedReplayBuffer, PackedPrioritizedReplayBuffer
+from .helper import Plotter
+from .metrics import MetricsLogger
+from .checkpoint import save_checkpoint, load_checkpoint, has_checkpoint
+from .profiler import PhaseTimer, NullPhaseTimer, ProfileWindow
+from .trajectory import TrajectoryRecorder
+from .scheduler import UpdateScheduler, AsyncLearner, PUBLISH_EVERY
+
+MAX_MEMORY = 100_000
+BATCH_SIZE = 1000
+LR = 0.001
+CHECKPOINT_EVERY = 50  # games
+TIMING_REPORT_EVERY = 100  # games
+
+
+class Agent:
+    # DQN agent shared by the games; a game subclasses it and defines get_state(game),
+    # build_model() and valid_states() when it needs more than Linear_QNet and the 'numpy'/'torch'/'script' policies
+
+    def __init__(self, state_shape, n_actions, exploration_games=80, prioritized=False, inference='numpy',
+                 packed=False, memory_size=None, seed=None, state_dtype=np.float32):
+        # state_shape: size of a feature vector or shape of an observation; n_actions: size of the one-hot moves
+        # exploration_games: random moves stop after this many games; memory_size: None - MAX_MEMORY
+        # seed: exploration, network init and replay sampling, None - unseeded
+        self.state_shape = state_shape
+        self.n_actions = n_actions
+        self.exploration_games = exploration_games
+        self.n_games = 0
+        self.epsilon = 0
+        self.gamma = 0.9
+        self.prioritized = prioritized
+        self.rng = random.Random(seed)
+        if seed is not None:
+            torch.manual_seed(seed)
+        # packed: binary states stored as bitmasks, ~6 bytes per transition instead of 133
+        if self.prioritized:
+            memory_class = PackedPrioritizedReplayBuffer if packed else PrioritizedReplayBuffer
+        else:
+            memory_class = PackedReplayBuffer if packed else ReplayBuffer
+        if memory_size is None:
+            memory_size = MAX_MEMORY
+        self.memory = memory_class(memory_size, state_shape, n_actions, seed, state_dtype)
+        # replaced by a real lock while a learner thread samples the memory
+        self.memory_lock = nullcontext()
+        self.model = self.build_model()
+        self.trainer = QTrainer(self.model, lr=LR, gamma=self.gamma)
+        self.inference = inference
+        self.policy = self.build_policy()
+
+    def build_policy(self, snapshot=False):
+        if self.inference == 'table':
+            # every possible state evaluated in one forward pass per weight update instead of one pass per step
+            return TablePolicy(self.model, self.valid_states(), snapshot)
+        return InferencePolicy(self.model, self.inference, snapshot)
+
+    def build_model(self):
+        return Linear_QNet(self.state_shape, 256, self.n_actions)
+
+    def valid_states(self):
+        raise ValueError(f'{type(self).__name__} has no table of states, choose another inference backend')
+
+    def get_state(self, game):
+        raise NotImplementedError
+
+    def remember(self, state, action, reward, next_state, done):
+        with self.memory_lock:
+            self.memory.push(state, action, reward, next_state, done)  # overwrites the oldest if MAX_MEMORY is reached
+
+    def train_long_memory(self):
+        if self.prioritized:
+            states, actions, rewards, next_states, dones, idx, weights = self.memory.sample(BATCH_SIZE)
+            td_errors = self.trainer.train_step(states, actions, rewards, next_states, dones, weights)
+            self.memory.update_priorities(idx, td_errors)
+            return
+
+        states, actions, rewards, next_states, dones = self.memory.sample(BATCH_SIZE)
+        self.trainer.train_step(states, actions, rewards, next_states, dones)
+
+    def train_short_memory(self, state, action, reward, next_state, done):
+        self.trainer.train_step(state, action, reward, next_state, done)
+
+    def get_action(self, state):
+        # random moves: tradeoff exploration / exploitation
+        self.epsilon = self.exploration_games - self.n_games
+        final_move = [0] * self.n_actions
+        if self.rng.randint(0, 200) < self.epsilon:
+            move = self.rng.randint(0, self.n_actions - 1)
+            final_move[move] = 1
+        else:
+            move = self.policy.act(state)
+            final_move[move] = 1
+        return final_move
+
+
+def train(agent, game, plot=True, run_name=None, resume=False, max_games=None, timing=True, profile_games=None,
+          trajectory=None, train_every=None, gradient_steps=1, batch_size=BATCH_SIZE, background_learner=False,
+          async_learner=False, publish_every=PUBLISH_EVERY, max_updates_per_step=None):
+    # agent: an Agent subclass of the game; game: play_step/reset game, seeded separately from the agent
+    # trajectory: file recording every episode
+    # train_every, gradient_steps, batch_size, background_learner: when the agent learns, see UpdateScheduler
+    # async_learner: learn continuously in a thread instead, see AsyncLearner for publish_every, max_updates_per_step
+    total_score = 0
+    record = 0
+    elapsed = 0
+    if async_learner:
+        scheduler = AsyncLearner(agent, batch_size, publish_every, max_updates_per_step)
+    else:
+        scheduler = UpdateScheduler(agent, train_every, gradient_steps, batch_size, background_learner)
+    if resume and has_checkpoint():
+        with scheduler.paused():
+            # an AsyncLearner thread is already running
+            train_state = load_checkpoint(agent, game)
+        total_score = train_state['total_score']
+        record = train_state['record']
+        elapsed = train_state['time']
+        run_name = train_state['run_name']
+        scheduler.steps = train_state.get('env_steps', 0)
+        # a snapshot policy still holds the weights the agent was built with
+        agent.policy.sync()
+        # the checkpoint is taken before the next game starts, so start it again from the restored RNG state
+        game.reset()
+        print('Resumed at game', agent.n_games, 'Record:', record)
+    plotter = Plotter() if plot else None
+    metrics = MetricsLogger(run_name)
+    recorder = TrajectoryRecorder(trajectory, agent.n_actions, game.w, game.h) if trajectory else None
+
+    start_time = time.perf_counter() - elapsed
+    episode_start = time.perf_counter()
+    episode_updates = 0
+    if timing:
+        timer = PhaseTimer(TIMING_REPORT_EVERY, profile_games, n_games=agent.n_games)
+    else:
+        # --profile-games without the timing report
+        timer = ProfileWindow(profile_games, n_games=agent.n_games) if profile_games else NullPhaseTimer()
+    while True:
+        # get old state
+        state_old = agent.get_state(game)
+        timer.mark('get_state')
+        # get move
+        final_move = agent.get_action(state_old)
+        timer.mark('get_action')
+        # perform move and get new state
+        reward, done, score = game.play_step(final_move)
+        timer.mark('play_step')
+        state_new = agent.get_state(game)
+        timer.mark('get_state')
+
+        agent.remember(state_old, final_move, reward, state_new, done)
+        timer.mark('remember')
+        scheduler.after_step(state_old, final_move, reward, state_new, done)
+        timer.mark('learn')
+        if recorder is not None:
+            recorder.record(final_move, reward)
+
+        if done:
+            length = game.frame_iteration
+            if recorder is not None:
+                recorder.end_episode(game)
+            # train long memory
+            agent.n_games += 1
+            scheduler.end_game()
+            timer.mark('train_long_memory')
+
+            if score > record:
+                record = score
+                with scheduler.paused():
+                    agent.model.save()
+            timer.mark('save')
+
+            print('Game', agent.n_games, 'Score', score, 'Record:', record)
+
+            total_score += score
+            mean_score = total_score / agent.n_games
+            if plotter is not None:
+                plotter.update(score, mean_score)
+
+            now = time.perf_counter()
+            # no loss yet while a scheduled run fills its first batch
+            loss = agent.trainer.loss
+            metrics.log(game=agent.n_games, score=score, length=length, epsilon=agent.epsilon,
+                        loss=None if loss is None else loss.item(), env_steps_per_sec=length / (now - episode_start),
+                        updates_per_sec=(agent.trainer.n_updates - episode_updates) / (now - episode_start),
+                        time=now - start_time)
+            episode_start = now
+            episode_updates = agent.trainer.n_updates
+            timer.mark('plot_and_metrics')
+
+            if agent.n_games % CHECKPOINT_EVERY == 0:
+                logs = {metrics.path: metrics.tell()}
+                if recorder is not None:
+                    logs[recorder.path] = recorder.tell()
+                with scheduler.paused():
+                    save_checkpoint(agent, game, {'total_score': total_score, 'record': record,
+                                                  'time': now - start_time, 'run_name': metrics.run_name,
+                                                  'env_steps': scheduler.steps}, logs=logs)
+                timer.mark('checkpoint')
+            timer.end_game(agent.n_games)
+            if max_games is not None and agent.n_games >= max_games:
+                break
+            game.reset()
+            timer.mark('reset')
+
+    scheduler.close()
+    timer.close()
+    metrics.close()
+    if recorder is not None:
+        recorder.close()
+    if plotter is not None:
+        plotter.close()
+
+
+def make_parser():
+    # the options of every game's agent.py, a game adds its own before parse_args()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resume', action='store_true', help='continue from ./checkpoint if there is one')
+    parser.add_argument('--headless', action='store_true', help='no window, no frame limit')
+    parser.add_argument('--prioritized', action='store_true', help='prioritized experience replay')
+    parser.add_argument('--packed-replay', action='store_true', help='bit-packed replay memory')
+    parser.add_argument('--memory-size', type=int, help=f'replay memory capacity in transitions, default {MAX_MEMORY}')
+    parser.add_argument('--no-plot', action='store_true', help='do not open the training plot')
+    parser.add_argument('--run-name', help='name of the metrics log, defaults to the start time')
+    parser.add_argument('--no-timing', action='store_true', help='turn off the per-phase timing report')
+    parser.add_argument('--profile-games', type=int, nargs=2, metavar=('FIRST', 'LAST'),
+                        help='record these games with cProfile into train.prof')
+    parser.add_argument('--seed', type=int, help='seed of the run, default: unseeded')
+    parser.add_argument('--trajectory', help='record every episode (seed, actions, rewards) into this file')
+    parser.add_argument('--replay', metavar='FILE', help='re-simulate a recorded trajectory file headless and exit')
+    parser.add_argument('--train-every', type=int, metavar='K',
+                        help='learn from replay every K env steps instead of after every step and every game')
+    parser.add_argument('--gradient-steps', type=int, default=1, metavar='M',
+                        help='with --train-every: batches per update')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='with --train-every: transitions per batch')
+    parser.add_argument('--background-learner', action='store_true',
+                        help='with --train-every: train in a thread while the env keeps stepping')
+    parser.add_argument('--async-learner', action='store_true',
+                        help='learn continuously in a thread, acting on published snapshots of the weights')
+    parser.add_argument('--publish-every', type=int, default=PUBLISH_EVERY,
+                        help='with --async-learner: updates between weight snapshots')
+    parser.add_argument('--max-updates-per-step', type=float,
+                        help='with --async-learner: cap on learner updates per env step')
+    return parser
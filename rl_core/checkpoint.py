@@ -0,0 +1,100 @@
+import os
+import json
+import shutil
+import numpy as np
+import torch
+
+CHECKPOINT_FOLDER = './checkpoint'
+KEEP = 2  # complete checkpoints kept on disk
+
+
+def save_checkpoint(agent, game, train_state, folder=CHECKPOINT_FOLDER, logs=None):
+    # logs: {path: size} of the append-only logs (metrics, trajectory) at this checkpoint
+    # everything is written to <name>.tmp and renamed when complete, then LATEST is switched atomically,
+    # so a crash at any point leaves the previous checkpoint usable
+    name = f'checkpoint-{agent.n_games:08d}'
+    path = os.path.join(folder, name)
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(os.path.join(tmp_path, 'replay'))
+
+    torch.save({
+        'model': agent.model.state_dict(),
+        'optimizer': agent.trainer.optimizer.state_dict(),
+        'torch_rng': torch.get_rng_state(),
+    }, os.path.join(tmp_path, 'state.pt'))
+
+    numpy_rng = np.random.get_state()
+    state = {
+        'train': train_state,
+        'n_games': agent.n_games,
+        'n_updates': agent.trainer.n_updates,
+        'agent_rng': agent.rng.getstate(),
+        'game_rng': game.seeds.getstate(),
+        'numpy_rng': [numpy_rng[0], numpy_rng[1].tolist()] + list(numpy_rng[2:]),
+        'replay': agent.memory.state_dict(),
+        'logs': logs or {},
+    }
+    with open(os.path.join(tmp_path, 'state.json'), 'w') as f:
+        json.dump(state, f)
+    agent.memory.save(os.path.join(tmp_path, 'replay'))
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    _write_latest(folder, name)
+
+    old = sorted(d for d in os.listdir(folder) if d.startswith('checkpoint-') and not d.endswith('.tmp'))
+    for d in old[:-KEEP]:
+        shutil.rmtree(os.path.join(folder, d), ignore_errors=True)
+
+
+def _write_latest(folder, name):
+    tmp_file = os.path.join(folder, 'LATEST.tmp')
+    with open(tmp_file, 'w') as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, os.path.join(folder, 'LATEST'))
+
+
+def _random_state(saved):
+    # random.Random state from its JSON form, where the tuples became lists
+    version, internal, gauss_next = saved
+    return version, tuple(internal), gauss_next
+
+
+def has_checkpoint(folder=CHECKPOINT_FOLDER):
+    return os.path.exists(os.path.join(folder, 'LATEST'))
+
+
+def load_checkpoint(agent, game, folder=CHECKPOINT_FOLDER):
+    # restores agent, optimizer, counters, agent and game RNG states and replay memory, returns the train_state
+    # the logs are cut back to their size at the checkpoint: the games played after it are played again
+    with open(os.path.join(folder, 'LATEST')) as f:
+        path = os.path.join(folder, f.read().strip())
+
+    tensors = torch.load(os.path.join(path, 'state.pt'))
+    agent.model.load_state_dict(tensors['model'])
+    agent.trainer.optimizer.load_state_dict(tensors['optimizer'])
+    torch.set_rng_state(tensors['torch_rng'])
+
+    with open(os.path.join(path, 'state.json')) as f:
+        state = json.load(f)
+    agent.n_games = state['n_games']
+    agent.trainer.n_updates = state['n_updates']
+    agent.rng.setstate(_random_state(state['agent_rng']))
+    game.seeds.setstate(_random_state(state['game_rng']))
+    numpy_rng = state['numpy_rng']
+    np.random.set_state((numpy_rng[0], np.array(numpy_rng[1], dtype=np.uint32), *numpy_rng[2:]))
+
+    agent.memory.load(os.path.join(path, 'replay'))
+    agent.memory.load_state_dict(state['replay'])
+    _truncate_logs(state.get('logs', {}))
+    return state['train']
+
+
+def _truncate_logs(logs):
+    for path, size in logs.items():
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            with open(path, 'r+b') as f:
+                f.truncate(size)
@@ -0,0 +1,220 @@
+import traceback
+import multiprocessing as mp
+import numpy as np
+
+# reset/step interface in the style of gymnasium over the play_step games, without depending on it:
+#   reset(seed=None) -> observation, info
+#   step(action) -> observation, reward, terminated, truncated, info
+# actions are integer indices instead of the one-hot lists play_step takes
+
+
+class Discrete:
+    # actions 0 .. n - 1
+
+    def __init__(self, n):
+        self.n = n
+        self.shape = ()
+        self.dtype = np.int64
+
+    def sample(self, rng):
+        return int(rng.integers(self.n))
+
+    def contains(self, x):
+        return 0 <= int(x) < self.n
+
+    def __repr__(self):
+        return f'Discrete({self.n})'
+
+
+class Box:
+    # array of `shape` with every value in [low, high]
+
+    def __init__(self, low, high, shape, dtype):
+        self.low = low
+        self.high = high
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+
+    def sample(self, rng):
+        if self.dtype.kind == 'f':
+            return rng.uniform(self.low, self.high, self.shape).astype(self.dtype)
+        return rng.integers(self.low, self.high, self.shape, endpoint=True).astype(self.dtype)
+
+    def contains(self, x):
+        x = np.asarray(x)
+        return x.shape == self.shape and bool(((x >= self.low) & (x <= self.high)).all())
+
+    def __repr__(self):
+        return f'Box({self.low}, {self.high}, {self.shape}, {self.dtype})'
+
+
+class GameEnv:
+    # one game behind the reset/step interface; subclasses create the game and define observe()
+    # terminated: the game says done; truncated: max_episode_steps reached first (None - never)
+
+    def __init__(self, game, observation_space, n_actions, max_episode_steps=None):
+        self.game = game
+        self.observation_space = observation_space
+        self.action_space = Discrete(n_actions)
+        self.max_episode_steps = max_episode_steps
+        self._moves = np.eye(n_actions, dtype=int).tolist()
+        self._steps = 0
+
+    def observe(self):
+        raise NotImplementedError
+
+    def reset(self, seed=None):
+        # seed: restarts the game's stream of episode seeds, so the following resets are reproducible as well
+        if seed is not None:
+            self.game.seeds.seed(seed)
+        self.game.reset()
+        self._steps = 0
+        return self.observe(), {'episode_seed': self.game.episode_seed}
+
+    def step(self, action):
+        reward, done, score = self.game.play_step(self._moves[action])
+        self._steps += 1
+        truncated = not done and self.max_episode_steps is not None and self._steps >= self.max_episode_steps
+        return self.observe(), reward, done, truncated, {'score': score}
+
+    def close(self):
+        pass
+
+
+class SyncVectorEnv:
+    # n envs stepped one after the other in this process, batched observations and results
+    # an env whose episode ends is reset inside step(): the returned observation is the first one of the next
+    # episode, infos['final_observation'] and infos['score'] hold the last observation and score of the ended one
+
+    def __init__(self, env_fns):
+        self.envs = [fn() for fn in env_fns]
+        self.n_envs = len(self.envs)
+        self.single_observation_space = self.envs[0].observation_space
+        self.single_action_space = self.envs[0].action_space
+        shape = (self.n_envs,) + self.single_observation_space.shape
+        self._observations = np.zeros(shape, dtype=self.single_observation_space.dtype)
+        self._final_observations = np.zeros(shape, dtype=self.single_observation_space.dtype)
+        self._rewards = np.zeros(self.n_envs, dtype=np.float32)
+        self._terminated = np.zeros(self.n_envs, dtype=bool)
+        self._truncated = np.zeros(self.n_envs, dtype=bool)
+        self._scores = np.zeros(self.n_envs, dtype=np.int64)
+
+    def reset(self, seed=None):
+        # seed: env i is reset with seed + i
+        for i, env in enumerate(self.envs):
+            self._observations[i] = env.reset(None if seed is None else seed + i)[0]
+        return self._observations.copy(), {}
+
+    def step(self, actions):
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            observation, reward, terminated, truncated, info = env.step(int(action))
+            self._rewards[i] = reward
+            self._terminated[i] = terminated
+            self._truncated[i] = truncated
+            self._scores[i] = info['score']
+            if terminated or truncated:
+                self._final_observations[i] = observation
+                observation = env.reset()[0]
+            self._observations[i] = observation
+        infos = {'score': self._scores.copy(), 'final_observation': self._final_observations.copy()}
+        return self._observations.copy(), self._rewards.copy(), self._terminated.copy(), self._truncated.copy(), infos
+
+    def close(self):
+        for env in self.envs:
+            env.close()
+
+
+def _worker(pipe, env_fns):
+    # runs a SyncVectorEnv over its share of the envs, answers one message per command
+    envs = None
+    try:
+        envs = SyncVectorEnv(env_fns)
+        pipe.send((True, (envs.single_observation_space, envs.single_action_space)))
+        while True:
+            command, data = pipe.recv()
+            if command == 'reset':
+                pipe.send((True, envs.reset(data)))
+            elif command == 'step':
+                pipe.send((True, envs.step(data)))
+            elif command == 'close':
+                break
+    except (KeyboardInterrupt, EOFError):
+        pass
+    except Exception:
+        pipe.send((False, traceback.format_exc()))
+    finally:
+        if envs is not None:
+            envs.close()
+        pipe.close()
+
+
+class AsyncVectorEnv:
+    # same interface as SyncVectorEnv, the envs step in n_workers subprocesses (default one per env);
+    # every worker steps its share of the envs in one round trip, so fewer workers than envs cut pipe overhead
+    # step_async / step_wait let the caller work while the envs step
+
+    def __init__(self, env_fns, n_workers=None, context=None):
+        # env_fns: picklable with a spawn or forkserver context, anything with fork (the Linux default)
+        self.n_envs = len(env_fns)
+        n_workers = min(n_workers or self.n_envs, self.n_envs)
+        ctx = mp.get_context(context)
+        bounds = np.linspace(0, self.n_envs, n_workers + 1).astype(int).tolist()
+        self._slices = [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+        self._pipes = []
+        self._processes = []
+        for s in self._slices:
+            parent, child = ctx.Pipe()
+            process = ctx.Process(target=_worker, args=(child, env_fns[s]), daemon=True)
+            process.start()
+            child.close()
+            self._pipes.append(parent)
+            self._processes.append(process)
+        self.closed = False
+        self.single_observation_space, self.single_action_space = self._receive()[0]
+
+    def _receive(self):
+        results = []
+        for pipe in self._pipes:
+            ok, result = pipe.recv()
+            if not ok:
+                self.close()
+                raise RuntimeError(f'env worker failed:\n{result}')
+            results.append(result)
+        return results
+
+    def reset(self, seed=None):
+        for pipe, s in zip(self._pipes, self._slices):
+            pipe.send(('reset', None if seed is None else seed + s.start))
+        return np.concatenate([observations for observations, _ in self._receive()]), {}
+
+    def step_async(self, actions):
+        actions = np.asarray(actions)
+        for pipe, s in zip(self._pipes, self._slices):
+            pipe.send(('step', actions[s]))
+
+    def step_wait(self):
+        results = self._receive()
+        observations, rewards, terminated, truncated, infos = zip(*results)
+        infos = {key: np.concatenate([info[key] for info in infos]) for key in infos[0]}
+        return (np.concatenate(observations), np.concatenate(rewards), np.concatenate(terminated),
+                np.concatenate(truncated), infos)
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for pipe in self._pipes:
+            try:
+                pipe.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+        for pipe in self._pipes:
+            pipe.close()
@@ -0,0 +1,77 @@
+import queue
+import multiprocessing as mp
+import numpy as np
+
+MAX_POINTS = 2000  # longer histories are downsampled to about this many points
+REFRESH = 0.2  # seconds between redraws
+
+
+class Plotter:
+    # draws the training curves in a separate process, the trainer only puts scores into a queue
+
+    def __init__(self):
+        self.queue = mp.Queue()
+        self.process = mp.Process(target=_plot_loop, args=(self.queue,), daemon=True)
+        self.process.start()
+
+    def update(self, score, mean_score):
+        if self.process.is_alive():
+            self.queue.put_nowait((score, mean_score))
+
+    def close(self):
+        if self.process.is_alive():
+            self.queue.put_nowait(None)
+        self.process.join(timeout=1)
+
+
+def _downsample(values):
+    step = -(-len(values) // MAX_POINTS)
+    x = np.arange(0, len(values), step)
+    if x[-1] != len(values) - 1:
+        x = np.append(x, len(values) - 1)
+    return x, np.asarray(values)[x]
+
+
+def _plot_loop(updates):
+    # matplotlib is only imported here, so the training process never loads it
+    import matplotlib.pyplot as plt
+
+    plt.ion()
+    fig, ax = plt.subplots()
+    ax.set_title('Training...')
+    ax.set_xlabel('Number of Games')
+    ax.set_ylabel('Score')
+    score_line, = ax.plot([], [])
+    mean_line, = ax.plot([], [])
+    score_text = ax.text(0, 0, '')
+    mean_text = ax.text(0, 0, '')
+    plt.show(block=False)
+
+    scores = []
+    mean_scores = []
+    while plt.fignum_exists(fig.number):
+        n = len(scores)
+        try:
+            item = updates.get(timeout=REFRESH)
+            while True:
+                if item is None:
+                    plt.close(fig)
+                    return
+                scores.append(item[0])
+                mean_scores.append(item[1])
+                item = updates.get_nowait()
+        except queue.Empty:
+            pass
+
+        if len(scores) > n:
+            score_line.set_data(*_downsample(scores))
+            mean_line.set_data(*_downsample(mean_scores))
+            score_text.set_position((len(scores) - 1, scores[-1]))
+            score_text.set_text(str(scores[-1]))
+            mean_text.set_position((len(mean_scores) - 1, mean_scores[-1]))
+            mean_text.set_text(str(mean_scores[-1]))
+            ax.relim()
+            ax.autoscale_view()
+            ax.set_ylim(ymin=0)
+            fig.canvas.draw_idle()
+        fig.canvas.flush_events()
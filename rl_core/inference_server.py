@@ -0,0 +1,271 @@
+import os
+import time
+import queue
+import socket
+import struct
+import threading
+import numpy as np
+import torch
+
+MAX_BATCH = 256  # states per forward pass
+MAX_WAIT = 0.0005  # seconds a batch waits for more states after its first one
+HEADER = struct.Struct('!I')  # socket request: number of states, followed by the float32 states
+
+# greedy actions for many envs from one Q network: observations from any number of callers are collected
+# and answered with one batched forward pass instead of one tiny pass per env and step
+#   in-process: server.act(state) / server.submit(states) from any thread, server.act_batch(states) directly
+#   other processes: server.serve(path) and InferenceClient(path, state_shape).act(state) over a Unix socket
+# both act() and sync() like a policy, so agent.policy = server (or a client) makes Agent.get_action use it
+
+
+class _Request:
+    # states of one caller, queued as chunks of at most max_batch states and answered by the serving thread
+
+    def __init__(self, n_states, n_chunks):
+        self.n_states = n_states
+        self.actions = None
+        self.error = None
+        self._pending = n_chunks  # only changed by the serving thread
+        self._done = threading.Event()
+        if not n_chunks:
+            self.actions = np.zeros(0, dtype=np.int64)
+            self._done.set()
+
+    def _answer(self, start, actions):
+        if len(actions) == self.n_states:
+            # the common case of a request in one chunk: no copy
+            self.actions = actions
+        else:
+            if self.actions is None:
+                self.actions = np.zeros(self.n_states, dtype=np.int64)
+            self.actions[start:start + len(actions)] = actions
+        self._pending -= 1
+        if self._pending == 0:
+            self._done.set()
+
+    def _fail(self, error):
+        self.error = error
+        self._done.set()
+
+    def result(self):
+        self._done.wait()
+        if self.error is not None:
+            raise RuntimeError('batched inference failed') from self.error
+        return self.actions
+
+
+def _recv_exactly(sock, n):
+    # None when the peer closed the connection before the first byte
+    buffer = bytearray(n)
+    view = memoryview(buffer)
+    received = 0
+    while received < n:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            if received == 0:
+                return None
+            raise ConnectionError(f'connection closed after {received} of {n} bytes')
+        received += count
+    return buffer
+
+
+class InferenceServer:
+    # a batch goes to the network once the next chunk would take it over max_batch states or max_wait seconds
+    # after its first state, whichever comes first; a request of more than max_batch states is split into chunks
+    # with max_batch = number of envs a full round of requests is answered without waiting
+    # the model is read live, without a copy, like InferencePolicy(snapshot=False)
+
+    def __init__(self, model, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.state_shape = tuple(model.input_shape)
+        self.batches = 0
+        self.decisions = 0
+        self.closed = False
+        self._queue = queue.SimpleQueue()  # (request, start, states) chunks, None once closed
+        self._next = None  # the chunk that did not fit into the last batch
+        self._thread = threading.Thread(target=self._run, name='inference-server', daemon=True)
+        self._thread.start()
+        self._listener = None
+        self._path = None
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+
+    def act_batch(self, states):
+        # one forward pass in the caller's thread, for a caller that already holds a batch (a vector env)
+        states = torch.as_tensor(np.asarray(states), dtype=torch.float).reshape((-1,) + self.state_shape)
+        with torch.inference_mode():
+            return self.model(states).argmax(dim=1).numpy()
+
+    def submit(self, states):
+        # (n, *state_shape) states, batched with those of other callers; request.result() blocks for the actions
+        states = np.asarray(states).reshape((-1,) + self.state_shape)
+        if len(states) <= self.max_batch:
+            starts = (0,) if len(states) else ()
+        else:
+            starts = range(0, len(states), self.max_batch)
+        if self.closed:
+            raise RuntimeError('the inference server is closed')
+        request = _Request(len(states), len(starts))
+        if len(starts) == 1:
+            self._queue.put((request, 0, states))
+        else:
+            for start in starts:
+                self._queue.put((request, start, states[start:start + self.max_batch]))
+        if self.closed:
+            # close() ran meanwhile, the chunks may have been queued after the serving thread stopped
+            self._fail_queued()
+        return request
+
+    def act(self, state):
+        return int(self.submit(state).result()[0])
+
+    def sync(self):
+        # every batch uses the current weights of the model
+        pass
+
+    def _collect(self, chunk):
+        batch = [chunk]
+        size = len(chunk[2])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            try:
+                # whatever is queued already is taken without waiting
+                chunk = self._queue.get_nowait()
+            except queue.Empty:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    chunk = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            if chunk is None:
+                # close(): answer this batch, then stop
+                self._queue.put(None)
+                break
+            if size + len(chunk[2]) > self.max_batch:
+                self._next = chunk
+                break
+            batch.append(chunk)
+            size += len(chunk[2])
+        return batch
+
+    def _run(self):
+        while True:
+            chunk = self._next
+            self._next = None
+            if chunk is None:
+                chunk = self._queue.get()
+                if chunk is None:
+                    return
+            batch = self._collect(chunk)
+            try:
+                actions = self.act_batch(np.concatenate([states for _, _, states in batch]))
+            except Exception as e:
+                for request, _, _ in batch:
+                    request._fail(e)
+                continue
+            self.batches += 1
+            self.decisions += len(actions)
+            offset = 0
+            for request, start, states in batch:
+                request._answer(start, actions[offset:offset + len(states)])
+                offset += len(states)
+
+    def serve(self, path):
+        # answers InferenceClients on the Unix socket at path, one thread per connection
+        if os.path.exists(path):
+            os.unlink(path)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(path)
+        self._listener.listen()
+        self._path = path
+        threading.Thread(target=self._accept, args=(self._listener,), name='inference-accept', daemon=True).start()
+
+    def _accept(self, listener):
+        while True:
+            try:
+                connection, _ = listener.accept()
+            except OSError:
+                # close() shut the listener down
+                return
+            with self._connections_lock:
+                self._connections.add(connection)
+            threading.Thread(target=self._handle, args=(connection,), name='inference-connection',
+                             daemon=True).start()
+
+    def _handle(self, connection):
+        state_bytes = int(np.prod(self.state_shape)) * 4
+        try:
+            while True:
+                header = _recv_exactly(connection, HEADER.size)
+                if header is None:
+                    break
+                n, = HEADER.unpack(header)
+                payload = _recv_exactly(connection, n * state_bytes)
+                states = np.frombuffer(payload, dtype=np.float32).reshape((n,) + self.state_shape)
+                connection.sendall(self.submit(states).result().astype(np.uint8).tobytes())
+        except (ConnectionError, OSError, RuntimeError):
+            # the client left, or the server was closed
+            pass
+        finally:
+            with self._connections_lock:
+                self._connections.discard(connection)
+            connection.close()
+
+    def _fail_queued(self):
+        # after the serving thread stopped: fails whatever is still queued, so no result() blocks forever
+        self._thread.join()
+        error = RuntimeError('the inference server is closed')
+        while True:
+            try:
+                chunk = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if chunk is not None:
+                chunk[0]._fail(error)
+
+    def close(self):
+        # requests submitted before are still answered, submit() raises afterwards
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.put(None)
+        self._fail_queued()
+        if self._listener is not None:
+            self._listener.shutdown(socket.SHUT_RDWR)
+            self._listener.close()
+            self._listener = None
+            os.unlink(self._path)
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.shutdown(socket.SHUT_RDWR)
+
+
+class InferenceClient:
+    # greedy actions from an InferenceServer.serve(path) in another process; one connection, one request in flight
+
+    def __init__(self, path, state_shape):
+        self.state_shape = (state_shape,) if isinstance(state_shape, int) else tuple(state_shape)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(path)
+
+    def act_batch(self, states):
+        states = np.ascontiguousarray(states, dtype=np.float32).reshape((-1,) + self.state_shape)
+        self._sock.sendall(HEADER.pack(len(states)) + states.tobytes())
+        reply = _recv_exactly(self._sock, len(states))
+        if reply is None:
+            raise ConnectionError('the inference server closed the connection')
+        return np.frombuffer(reply, dtype=np.uint8)
+
+    def act(self, state):
+        return int(self.act_batch(state)[0])
+
+    def sync(self):
+        # the server acts with the current weights of its model
+        pass
+
+    def close(self):
+        self._sock.close()
@@ -0,0 +1,94 @@
+import os
+import sys
+import json
+import time
+import atexit
+
+METRICS_FOLDER = './metrics'
+FLUSH_EVERY = 100  # records kept in memory before one write to disk
+
+
+class MetricsLogger:
+    # appends one JSON line per record to ./metrics/<run_name>.jsonl, written in batches
+
+    def __init__(self, run_name=None, flush_every=FLUSH_EVERY):
+        if run_name is None:
+            run_name = time.strftime('%Y%m%d-%H%M%S')
+        if not os.path.exists(METRICS_FOLDER):
+            os.makedirs(METRICS_FOLDER)
+
+        self.run_name = run_name
+        self.path = os.path.join(METRICS_FOLDER, run_name + '.jsonl')
+        self.flush_every = flush_every
+        self.records = []
+        atexit.register(self.flush)  # keep the last records when training is interrupted
+
+    def log(self, **record):
+        self.records.append(record)
+        if len(self.records) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self.records:
+            return
+        lines = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in self.records)
+        with open(self.path, 'a') as f:
+            f.write(lines)
+        self.records.clear()
+
+    def tell(self):
+        # size of the log with every record so far written, stored in checkpoints
+        self.flush()
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def close(self):
+        self.flush()
+
+
+def read_metrics(path):
+    # columns of a metrics log: {name: [value per record]}, None where a record lacks the field
+    columns = {}
+    n = 0
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            for name, value in record.items():
+                columns.setdefault(name, [None] * n).append(value)
+            n += 1
+            for values in columns.values():
+                if len(values) < n:
+                    values.append(None)
+    return columns
+
+
+def _mean(values):
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+
+def summarize(path, last=100):
+    columns = read_metrics(path)
+    scores = columns.get('score', [])
+    return {
+        'run': os.path.splitext(os.path.basename(path))[0],
+        'games': len(scores),
+        'record': max(scores) if scores else None,
+        'mean_score': _mean(scores),
+        f'mean_score_last_{last}': _mean(scores[-last:]),
+        'mean_length': _mean(columns.get('length', [])),
+        'env_steps_per_sec': _mean(columns.get('env_steps_per_sec', [])),
+        'updates_per_sec': _mean(columns.get('updates_per_sec', [])),
+        'wall_time': columns['time'][-1] if columns.get('time') else None,
+    }
+
+
+def compare(paths, last=100):
+    summaries = [summarize(path, last) for path in paths]
+    for name in summaries[0]:
+        values = [s[name] for s in summaries]
+        print(f'{name:>20}', *(f'{v:>16.2f}' if isinstance(v, float) else f'{str(v):>16}' for v in values))
+
+
+if __name__ == '__main__':
+    # python -m rl_core.metrics metrics/run_a.jsonl metrics/run_b.jsonl
+    compare(sys.argv[1:])
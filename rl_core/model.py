@@ -0,0 +1,242 @@
+import copy
+import torch
+import numpy as np
+import torch.nn as nn
+import torch.optim as optim
+import torch.nn.functional as F
+import os
+
+
+class Linear_QNet(nn.Module):
+    def __init__(self, input_size, hidden_size, output_size):
+        super().__init__()
+        self.input_shape = (input_size,)
+        self.linear1 = nn.Linear(input_size, hidden_size)
+        self.linear2 = nn.Linear(hidden_size, output_size)
+
+    def forward(self, x):
+        x = F.relu(self.linear1(x))
+        x = self.linear2(x)
+        return x
+
+    def save(self, file_name='model.pth'):
+        model_folder_path = './model'
+        if not os.path.exists(model_folder_path):
+            os.makedirs(model_folder_path)
+
+        file_name = os.path.join(model_folder_path, file_name)
+        torch.save(self.state_dict(), file_name)
+
+    def load(self, file_name='model.pth'):
+        file_name = os.path.join('./model', file_name)
+        self.load_state_dict(torch.load(file_name))
+
+
+class ConvQNet(nn.Module):
+    # Q network over a (channels, rows, cols) grid observation, for a single grid or a batch;
+    # strided convolutions and adaptive pooling keep the number of weights independent of the board size
+    def __init__(self, in_channels, rows, cols, output_size, hidden_size=256, pooled=4):
+        super().__init__()
+        self.input_shape = (in_channels, rows, cols)
+        self.conv1 = nn.Conv2d(in_channels, 16, 3, padding=1)
+        self.conv2 = nn.Conv2d(16, 32, 3, stride=2, padding=1)
+        self.conv3 = nn.Conv2d(32, 32, 3, stride=2, padding=1)
+        self.pool = nn.AdaptiveMaxPool2d(pooled)
+        self.fc1 = nn.Linear(32 * pooled * pooled, hidden_size)
+        self.fc2 = nn.Linear(hidden_size, output_size)
+
+    def forward(self, x):
+        single = x.dim() == 3
+        if single:
+            x = x.unsqueeze(0)
+        x = F.relu(self.conv1(x))
+        x = F.relu(self.conv2(x))
+        x = F.relu(self.conv3(x))
+        x = self.pool(x).flatten(1)
+        x = F.relu(self.fc1(x))
+        x = self.fc2(x)
+        return x[0] if single else x
+
+    def save(self, file_name='conv_model.pth'):
+        Linear_QNet.save(self, file_name)
+
+    def load(self, file_name='conv_model.pth'):
+        Linear_QNet.load(self, file_name)
+
+
+class NumpyQNet:
+    # Linear_QNet forward pass in NumPy with preallocated buffers, for acting only
+    # snapshot=False: the arrays are views of the torch parameters and follow every optimizer step for free
+    # snapshot=True: private copies, refreshed by sync(); the copies replace the old ones in a single assignment,
+    # so sync() may run in a learner thread while another thread acts, a call sees either all old or all new weights
+
+    def __init__(self, model, snapshot=False):
+        self.model = model
+        self.snapshot = snapshot
+        self.sync()
+        w1, _, w2, _ = self.params
+        self._x = np.zeros(w1.shape[1], dtype=np.float32)
+        self._hidden = np.zeros(w1.shape[0], dtype=np.float32)
+        self._out = np.zeros(w2.shape[0], dtype=np.float32)
+
+    def sync(self):
+        params = [p.detach().numpy() for p in (self.model.linear1.weight, self.model.linear1.bias,
+                                               self.model.linear2.weight, self.model.linear2.bias)]
+        if self.snapshot:
+            params = [p.copy() for p in params]
+        self.params = tuple(params)
+
+    def __call__(self, state):
+        w1, b1, w2, b2 = self.params
+        np.copyto(self._x, state, casting='unsafe')
+        np.dot(w1, self._x, out=self._hidden)
+        self._hidden += b1
+        np.maximum(self._hidden, 0, out=self._hidden)
+        np.dot(w2, self._hidden, out=self._out)
+        self._out += b2
+        return self._out
+
+
+class InferencePolicy:
+    # greedy action of a Q network without autograd and without allocating per call
+    # backend: 'numpy' (NumpyQNet, Linear_QNet only), 'torch' (inference_mode, reused input tensor)
+    # or 'script' (TorchScript trace)
+    # snapshot: act on a copy of the weights taken at sync(), for a learner that trains the model in another thread
+
+    def __init__(self, model, backend='numpy', snapshot=False):
+        self.model = model
+        self.backend = backend
+        self.snapshot = snapshot
+        if backend not in ('numpy', 'torch', 'script'):
+            raise ValueError(f'unknown inference backend {backend!r}')
+        self.net = self._build()
+        self._x = torch.zeros(model.input_shape)
+
+    def _build(self):
+        if self.backend == 'numpy':
+            return NumpyQNet(self.model, self.snapshot)
+        model = copy.deepcopy(self.model) if self.snapshot else self.model
+        if self.backend == 'script':
+            # the traced module shares its parameters with model, so it stays in sync as well
+            return torch.jit.trace(model, torch.zeros(model.input_shape))
+        return model
+
+    def sync(self):
+        # called when the learner publishes new weights; only a snapshot needs to copy them
+        if not self.snapshot:
+            return
+        if self.backend == 'numpy':
+            self.net.sync()
+        else:
+            # the new copy is swapped in by one assignment, like NumpyQNet.sync
+            self.net = self._build()
+
+    def act(self, state):
+        if self.backend == 'numpy':
+            return int(self.net(state).argmax())
+        with torch.inference_mode():
+            self._x.copy_(torch.from_numpy(np.asarray(state)))
+            return int(self.net(self._x).argmax())
+
+
+class TablePolicy:
+    # greedy actions for every possible binary state precomputed in one batched forward pass,
+    # acting is a lookup by the state packed into an integer (bit i = feature i)
+    # snapshot: sync() rebuilds the table right away, in the learner's thread, instead of at the next act()
+
+    def __init__(self, model, states, snapshot=False):
+        # states: (n, input_size) array of all states the agent can produce
+        self.model = model
+        self.snapshot = snapshot
+        self._bits = 1 << np.arange(states.shape[1])
+        self._keys = states.astype(np.int64) @ self._bits
+        self._inputs = torch.as_tensor(states, dtype=torch.float)
+        self.table = np.full(2 ** states.shape[1], -1, dtype=np.int8)
+        self.stale = True
+
+    def sync(self):
+        if self.snapshot:
+            self.refresh()
+        else:
+            # rebuilt lazily, on the first act() after new weights were published
+            self.stale = True
+
+    def refresh(self):
+        # a new table swapped in whole, which also forgets the states evaluated one by one with the old weights
+        table = np.full(len(self.table), -1, dtype=np.int8)
+        with torch.inference_mode():
+            table[self._keys] = self.model(self._inputs).argmax(dim=1).numpy()
+        self.table = table
+        self.stale = False
+
+    def act(self, state):
+        if self.stale:
+            self.refresh()
+        key = int(np.dot(state, self._bits))
+        move = self.table[key]
+        if move < 0:
+            # a state outside the enumerated set, evaluate it once and keep it until the next refresh
+            with torch.inference_mode():
+                move = self.table[key] = self.model(torch.as_tensor(state, dtype=torch.float)).argmax().item()
+        return int(move)
+
+
+class QTrainer:
+    def __init__(self, model, lr, gamma):
+        self.lr = lr
+        self.gamma = gamma
+        self.model = model
+        self.optimizer = optim.Adam(model.parameters(), lr=self.lr)
+        self.criterion = nn.MSELoss()
+        self.n_updates = 0
+        self.loss = None
+
+    def train_step(self, state, action, reward, next_state, done, weights=None):
+        # weights: optional importance-sampling weight per sample (prioritized replay)
+        # returns the TD errors of the batch, used to refresh replay priorities
+        # accepts numpy arrays and lists from the agent as well as ready-made tensors from ReplayBuffer
+        pred, target, q_new, action_idx = self._target(state, action, reward, next_state, done)
+
+        self.optimizer.zero_grad()
+        if weights is None:
+            loss = self.criterion(target, pred)
+        else:
+            loss = (torch.as_tensor(weights).unsqueeze(1) * (target - pred) ** 2).mean()
+        loss.backward()
+
+        self.optimizer.step()
+        self.n_updates += 1
+        self.loss = loss.detach()
+        return (q_new - pred.detach().gather(1, action_idx).squeeze(1)).numpy()
+
+    def _target(self, state, action, reward, next_state, done):
+        # predictions of the batch and their targets: pred with the taken action's value replaced by Q_new
+        state = torch.as_tensor(state, dtype=torch.float)
+        next_state = torch.as_tensor(next_state, dtype=torch.float)
+        action = torch.as_tensor(action, dtype=torch.long)
+        reward = torch.as_tensor(reward, dtype=torch.float)
+        done = torch.as_tensor(done, dtype=torch.bool)
+        # (n, x) or (n, channels, rows, cols)
+
+        if action.dim() == 1:
+            # a single transition: one one-hot action, a state of any shape
+            state = torch.unsqueeze(state, 0)
+            next_state = torch.unsqueeze(next_state, 0)
+            action = torch.unsqueeze(action, 0)
+            reward = torch.unsqueeze(reward, 0)
+            done = torch.unsqueeze(done, 0)
+
+        # 1: predicted Q values with current state
+        pred = self.model(state)
+
+        # 2: Q_new = r + y * max(next_predicted Q value) -> only do this if not done
+        with torch.no_grad():
+            next_q = self.model(next_state).max(dim=1)[0]
+        q_new = torch.where(done, reward, reward + self.gamma * next_q)
+
+        # preds[argmax(action)] = Q_new
+        action_idx = torch.argmax(action, dim=1, keepdim=True)
+        target = pred.detach().clone()
+        target.scatter_(1, action_idx, q_new.unsqueeze(1))
+        return pred, target, q_new, action_idx
+
@@ -0,0 +1,123 @@
+import time
+import atexit
+import cProfile
+
+BUCKETS = 48  # histogram buckets by bit length of the duration in ns, the last one collects everything longer
+
+
+class ProfileWindow:
+    # records games first..last (both included) with cProfile into profile_file; same interface as PhaseTimer,
+    # so it is the timer of a run with --no-timing that still profiles
+
+    def __init__(self, profile_games, profile_file='train.prof', n_games=0):
+        # n_games: games played before, non zero when training resumed from a checkpoint
+        first, last = profile_games
+        if not 1 <= first <= last:
+            raise ValueError(f'profile_games must be 1 <= first <= last, got {first}, {last}')
+        self.first = first
+        self.last = last
+        self.profile_file = profile_file
+        self.n_games = n_games  # last finished game
+        self._profiler = None
+        if first <= n_games + 1 <= last:
+            # the window starts with the next game, end_game is not called before it
+            self._start(n_games + 1)
+        atexit.register(self.close)  # an interrupted run still writes the games profiled so far
+
+    def _start(self, first):
+        self._started_at = first
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def mark(self, phase):
+        pass
+
+    def end_game(self, n_games):
+        self.n_games = n_games
+        if n_games == self.first - 1:
+            self._start(self.first)
+        elif n_games == self.last:
+            self.close()
+
+    def close(self):
+        # also for a run that stops inside the window: writes the games profiled so far
+        if self._profiler is None:
+            return
+        self._profiler.disable()
+        self._profiler.dump_stats(self.profile_file)
+        self._profiler = None
+        print('Profile of games', self._started_at, '-', self.n_games, 'written to', self.profile_file)
+
+
+class PhaseTimer:
+    # mark(phase) charges the time since the previous mark to `phase`, so consecutive phases cost one clock read each
+
+    def __init__(self, report_every=100, profile_games=None, profile_file='train.prof', n_games=0):
+        # profile_games: (first, last) games, both included, recorded with cProfile into profile_file
+        # n_games: games played before this timer, non zero when training resumed from a checkpoint
+        self.report_every = report_every
+        self.profile = None
+        if profile_games is not None:
+            self.profile = ProfileWindow(profile_games, profile_file, n_games)
+        self.histograms = {}
+        self.totals = {}
+        self._last = time.perf_counter_ns()
+
+    def mark(self, phase):
+        now = time.perf_counter_ns()
+        elapsed = now - self._last
+        self._last = now
+        histogram = self.histograms.get(phase)
+        if histogram is None:
+            histogram = self.histograms[phase] = [0] * BUCKETS
+            self.totals[phase] = 0
+        histogram[min(elapsed.bit_length(), BUCKETS - 1)] += 1
+        self.totals[phase] += elapsed
+
+    def end_game(self, n_games):
+        if self.profile is not None:
+            self.profile.end_game(n_games)
+
+        if n_games % self.report_every == 0:
+            self.report(n_games)
+            self.histograms.clear()
+            self.totals.clear()
+        self._last = time.perf_counter_ns()
+
+    def close(self):
+        if self.profile is not None:
+            self.profile.close()
+
+    def report(self, n_games):
+        wall = sum(self.totals.values())
+        print(f'Timing of the last {self.report_every} games (up to game {n_games}), {wall / 1e9:.1f} s')
+        print(f'{"phase":>20} {"calls":>9} {"total s":>9} {"share":>7} {"mean us":>10} {"p50 us":>10} {"p99 us":>10}')
+        for phase, total in sorted(self.totals.items(), key=lambda item: -item[1]):
+            histogram = self.histograms[phase]
+            calls = sum(histogram)
+            print(f'{phase:>20} {calls:>9} {total / 1e9:>9.2f} {total / wall:>7.1%} {total / calls / 1e3:>10.1f}'
+                  f' {_percentile(histogram, 0.5) / 1e3:>10.1f} {_percentile(histogram, 0.99) / 1e3:>10.1f}')
+
+
+def _percentile(histogram, q):
+    # upper bound of the bucket holding the q-th call: within a factor of 2 of the real value
+    target = q * sum(histogram)
+    seen = 0
+    for bits, count in enumerate(histogram):
+        seen += count
+        if seen >= target:
+            return 2 ** bits
+    return 2 ** (len(histogram) - 1)
+
+
+class NullPhaseTimer:
+    # disabled timing: same interface, every call returns immediately
+
+    def mark(self, phase):
+        pass
+
+    def end_game(self, n_games):
+        pass
+
+    def close(self):
+        pass
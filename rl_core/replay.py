@@ -0,0 +1,257 @@
+import os
+import numpy as np
+import torch
+
+
+class ReplayBuffer:
+    ARRAYS = ('states', 'actions', 'rewards', 'next_states', 'dones')
+
+    def __init__(self, capacity, state_size, action_size, seed=None, state_dtype=np.float32):
+        # state_size: length of a feature vector or the shape of an observation, e.g. (channels, rows, cols)
+        self.capacity = capacity
+        self.position = 0
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+        state_shape = state_size if isinstance(state_size, tuple) else (state_size,)
+        self.states = np.zeros((capacity,) + state_shape, dtype=state_dtype)
+        self.actions = np.zeros((capacity, action_size), dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity,) + state_shape, dtype=state_dtype)
+        self.dones = np.zeros(capacity, dtype=bool)
+
+    def __len__(self):
+        return self.size
+
+    def push(self, state, action, reward, next_state, done):
+        # overwrites the oldest transition once the buffer is full
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size):
+        if self.size > batch_size:
+            idx = self.rng.choice(self.size, batch_size, replace=False)
+        else:
+            idx = np.arange(self.size)
+        return self._gather(idx)
+
+    def _gather(self, idx):
+        return (torch.from_numpy(self.states[idx]),
+                torch.from_numpy(self.actions[idx]),
+                torch.from_numpy(self.rewards[idx]),
+                torch.from_numpy(self.next_states[idx]),
+                torch.from_numpy(self.dones[idx]))
+
+    def state_dict(self):
+        return {'position': self.position, 'size': self.size, 'rng': self.rng.bit_generator.state}
+
+    def load_state_dict(self, state):
+        self.position = state['position']
+        self.size = state['size']
+        self.rng.bit_generator.state = state['rng']
+
+    def save(self, folder):
+        for name in self.ARRAYS:
+            np.save(os.path.join(folder, name + '.npy'), getattr(self, name))
+
+    def load(self, folder):
+        # memory-mapped copy-on-write: pages are read when sampled, later pushes stay private to this process
+        for name in self.ARRAYS:
+            array = np.load(os.path.join(folder, name + '.npy'), mmap_mode='c')
+            if array.shape != getattr(self, name).shape:
+                raise ValueError(f'{name}.npy has shape {array.shape}, expected {getattr(self, name).shape}')
+            setattr(self, name, array)
+
+
+class PackedReplayBuffer(ReplayBuffer):
+    # compact storage for binary states: each state is a uint16 bitmask (bit i = feature i), the action a uint8
+    # index, the reward an int8 and done one bit, about 6 bytes per transition instead of 133;
+    # _gather unpacks the sampled rows to the same float/one-hot batch ReplayBuffer returns
+
+    def __init__(self, capacity, state_size, action_size, seed=None, state_dtype=None):
+        # state_dtype is not used: states are always stored as uint16 bitmasks
+        if not isinstance(state_size, int) or state_size > 16:
+            raise ValueError(f'PackedReplayBuffer packs at most 16 binary features, got {state_size}')
+        self.capacity = capacity
+        self.position = 0
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+        self._bits = 1 << np.arange(state_size)
+        self._one_hot = np.eye(action_size, dtype=np.int64)
+
+        self.states = np.zeros(capacity, dtype=np.uint16)
+        self.actions = np.zeros(capacity, dtype=np.uint8)
+        self.rewards = np.zeros(capacity, dtype=np.int8)
+        self.next_states = np.zeros(capacity, dtype=np.uint16)
+        self.dones = np.zeros((capacity + 7) // 8, dtype=np.uint8)
+
+    def push(self, state, action, reward, next_state, done):
+        # rewards must be integers in [-128, 127], states 0/1 valued
+        i = self.position
+        self.states[i] = np.dot(state, self._bits)
+        # list.index is much cheaper than np.argmax on the one-hot list Agent.get_action builds
+        self.actions[i] = action.index(1) if isinstance(action, list) else np.argmax(action)
+        self.rewards[i] = reward
+        self.next_states[i] = np.dot(next_state, self._bits)
+        if done:
+            self.dones[i >> 3] |= 1 << (i & 7)
+        else:
+            self.dones[i >> 3] &= 0xFF ^ (1 << (i & 7))
+
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _unpack_states(self, packed):
+        return ((packed[:, None].astype(np.int64) & self._bits) != 0).astype(np.float32)
+
+    def _gather(self, idx):
+        return (torch.from_numpy(self._unpack_states(self.states[idx])),
+                torch.from_numpy(self._one_hot[self.actions[idx]]),
+                torch.from_numpy(self.rewards[idx].astype(np.float32)),
+                torch.from_numpy(self._unpack_states(self.next_states[idx])),
+                torch.from_numpy((self.dones[idx >> 3] >> (idx & 7) & 1).astype(bool)))
+
+
+class SumTree:
+    # binary tree over `capacity` leaves stored in one array: node i has children 2i and 2i + 1,
+    # leaves start at self.leaves, tree[1] is the total priority
+
+    def __init__(self, capacity):
+        self.leaves = 1
+        while self.leaves < capacity:
+            self.leaves *= 2
+        self.tree = np.zeros(2 * self.leaves, dtype=np.float64)
+
+    def total(self):
+        return self.tree[1]
+
+    def set(self, i, priority):
+        # single leaf, plain scalar walk to the root: much cheaper than update() for one index
+        node = i + self.leaves
+        self.tree[node] = priority
+        node //= 2
+        while node >= 1:
+            self.tree[node] = self.tree[2 * node] + self.tree[2 * node + 1]
+            node //= 2
+
+    def update(self, idx, priorities):
+        # O(log n) per index, one vectorized pass per tree level
+        nodes = np.asarray(idx) + self.leaves
+        self.tree[nodes] = priorities
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            nodes = np.unique(nodes // 2)
+
+    def find(self, values):
+        # leaf index for every prefix-sum value, descending all values at once
+        nodes = np.ones(len(values), dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+        while nodes[0] < self.leaves:
+            left = self.tree[2 * nodes]
+            go_right = values > left
+            values -= left * go_right
+            nodes = 2 * nodes + go_right
+        return nodes - self.leaves
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    ARRAYS = ReplayBuffer.ARRAYS + ('priorities',)
+
+    def __init__(self, capacity, state_size, action_size, seed=None, state_dtype=np.float32, alpha=0.6, beta=0.4,
+                 beta_increment=1e-4, eps=1e-3):
+        super().__init__(capacity, state_size, action_size, seed, state_dtype)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.eps = eps
+        self.max_priority = 1.0
+        self.tree = SumTree(capacity)
+
+    def push(self, state, action, reward, next_state, done):
+        # new transitions get the highest priority seen so far, so each is replayed at least once
+        self.tree.set(self.position, self.max_priority)
+        super().push(state, action, reward, next_state, done)
+
+    def sample(self, batch_size):
+        batch_size = min(batch_size, self.size)
+        # stratified: one draw from each of batch_size equal slices of the total priority
+        segment = self.tree.total() / batch_size
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        idx = np.minimum(self.tree.find(values), self.size - 1)
+
+        # importance-sampling weights, normalized by the largest one
+        probs = self.tree.tree[idx + self.tree.leaves] / self.tree.total()
+        weights = (self.size * probs) ** (-self.beta)
+        weights /= weights.max()
+        self.beta = min(1.0, self.beta + self.beta_increment)
+
+        return self._gather(idx) + (idx, torch.from_numpy(weights.astype(np.float32)))
+
+    def update_priorities(self, idx, td_errors):
+        priorities = (np.abs(td_errors) + self.eps) ** self.alpha
+        self.tree.update(idx, priorities)
+        self.max_priority = max(self.max_priority, priorities.max())
+
+    @property
+    def priorities(self):
+        return self.tree.tree
+
+    @priorities.setter
+    def priorities(self, value):
+        self.tree.tree = value
+
+    def state_dict(self):
+        state = super().state_dict()
+        state['beta'] = self.beta
+        state['max_priority'] = float(self.max_priority)
+        return state
+
+    def load_state_dict(self, state):
+        super().load_state_dict(state)
+        self.beta = state['beta']
+        self.max_priority = state['max_priority']
+
+
+class PackedPrioritizedReplayBuffer(PrioritizedReplayBuffer, PackedReplayBuffer):
+    # prioritized sampling over packed storage
+    pass
+
+
+def _benchmark_sampling(capacity, batch_size=1000, repeats=50):
+    import time
+
+    buffers = [ReplayBuffer(capacity, 13, 3), PrioritizedReplayBuffer(capacity, 13, 3),
+               PackedReplayBuffer(capacity, 13, 3)]
+    for buffer in buffers:
+        buffer.size = capacity
+        if isinstance(buffer, PrioritizedReplayBuffer):
+            buffer.update_priorities(np.arange(capacity), buffer.rng.random(capacity) * 10)
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            batch = buffer.sample(batch_size)
+        sample_ms = (time.perf_counter() - start) / repeats * 1000
+
+        nbytes = sum(getattr(buffer, name).nbytes for name in ReplayBuffer.ARRAYS)
+        line = f'{type(buffer).__name__:>29} capacity {capacity:>9,} sample({batch_size}) {sample_ms:.3f} ms {nbytes / capacity:.1f} B/transition'
+        if isinstance(buffer, PrioritizedReplayBuffer):
+            idx, td_errors = batch[5], buffer.rng.random(batch_size)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                buffer.update_priorities(idx, td_errors)
+            update_ms = (time.perf_counter() - start) / repeats * 1000
+            line += f' update_priorities({batch_size}) {update_ms:.3f} ms'
+        print(line)
+
+
+if __name__ == '__main__':
+    for capacity in (100_000, 1_000_000):
+        _benchmark_sampling(capacity)
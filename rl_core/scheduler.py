@@ -0,0 +1,162 @@
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+PUBLISH_EVERY = 20  # AsyncLearner updates between weight publications to the acting policy
+IDLE_SLEEP = 0.001  # seconds an AsyncLearner waits for more transitions
+
+
+class UpdateScheduler:
+    # decides when the agent learns
+    # train_every=None: the original schedule, one train_step on the newest transition after every env step
+    #   and one train_long_memory batch at the end of every game
+    # train_every=K: gradient_steps batches of batch_size sampled from replay every K env steps, nothing per game;
+    #   updates start once the memory holds batch_size transitions
+    # background: with train_every, the batches are sampled here and trained in a worker thread while the env keeps
+    #   stepping; the next update joins the previous one first, so at most one is in flight and replay is only
+    #   touched by the acting thread. The policy reads the weights while they change, acting is not reproducible
+
+    def __init__(self, agent, train_every=None, gradient_steps=1, batch_size=1000, background=False):
+        # batch_size: the default is rl_core.agent.BATCH_SIZE
+        self.agent = agent
+        self.train_every = train_every
+        self.gradient_steps = gradient_steps
+        self.batch_size = batch_size
+        self.steps = 0  # env steps, part of the checkpoint so a resumed run keeps its update phase
+        self._executor = None
+        if background and train_every:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='learner')
+        self._pending = None
+
+    def after_step(self, state, action, reward, next_state, done):
+        # called after the transition went into replay
+        self.steps += 1
+        if self.train_every is None:
+            self.agent.train_short_memory(state, action, reward, next_state, done)
+        elif self.steps % self.train_every == 0 and len(self.agent.memory) >= self.batch_size:
+            self._update()
+
+    def end_game(self):
+        if self.train_every is None:
+            self.agent.train_long_memory()
+            # a table policy acts with the weights of the start of each game
+            self.agent.policy.sync()
+
+    def _update(self):
+        self.wait()
+        batches = [self.agent.memory.sample(self.batch_size) for _ in range(self.gradient_steps)]
+        if self._executor is None:
+            self._finish(self._train(batches))
+        else:
+            self._pending = self._executor.submit(self._train, batches)
+
+    def _train(self, batches):
+        # returns the (idx, td_errors) of prioritized batches, written back to replay by the acting thread
+        trainer = self.agent.trainer
+        priorities = []
+        for batch in batches:
+            if self.agent.prioritized:
+                states, actions, rewards, next_states, dones, idx, weights = batch
+                priorities.append((idx, trainer.train_step(states, actions, rewards, next_states, dones, weights)))
+            else:
+                trainer.train_step(*batch)
+        return priorities
+
+    def _finish(self, priorities):
+        for idx, td_errors in priorities:
+            self.agent.memory.update_priorities(idx, td_errors)
+        self.agent.policy.sync()
+
+    def wait(self):
+        # joins the update in flight
+        if self._pending is not None:
+            priorities = self._pending.result()
+            self._pending = None
+            self._finish(priorities)
+
+    @contextmanager
+    def paused(self):
+        # no update runs inside: for anything that reads model, optimizer or replay as a whole (save, checkpoint)
+        self.wait()
+        yield
+
+    def close(self):
+        self.wait()
+        if self._executor is not None:
+            self._executor.shutdown()
+
+
+class AsyncLearner:
+    # same interface as UpdateScheduler: a thread samples batch_size batches from replay and trains the model
+    # continuously, independent of env steps; the acting loop only pushes transitions and acts on a snapshot of
+    # the weights that the learner publishes every publish_every updates (the policy is rebuilt with snapshot=True)
+    # max_updates_per_step: the learner waits while it is that many updates per env step ahead, None - never;
+    # counted over the whole run with trainer.n_updates and steps, both restored by a resume
+    # torch releases the GIL in its kernels, so on a multicore machine learning overlaps acting; not reproducible
+
+    def __init__(self, agent, batch_size=1000, publish_every=PUBLISH_EVERY, max_updates_per_step=None):
+        self.agent = agent
+        self.batch_size = batch_size
+        self.publish_every = publish_every
+        self.max_updates_per_step = max_updates_per_step
+        self.steps = 0
+        self.updates = 0  # updates of this learner, for publish_every
+        self.error = None
+        agent.memory_lock = threading.Lock()
+        agent.policy = agent.build_policy(snapshot=True)
+        # held for one whole update, so paused() waits for the update in flight and keeps the next one out
+        self._update_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='learner', daemon=True)
+        self._thread.start()
+
+    def _ready(self):
+        if len(self.agent.memory) < self.batch_size:
+            return False
+        if self.max_updates_per_step is None:
+            return True
+        return self.agent.trainer.n_updates < self.max_updates_per_step * self.steps
+
+    def _run(self):
+        agent = self.agent
+        try:
+            while not self._stop.is_set():
+                if not self._ready():
+                    time.sleep(IDLE_SLEEP)
+                    continue
+                with self._update_lock:
+                    with agent.memory_lock:
+                        batch = agent.memory.sample(self.batch_size)
+                    if agent.prioritized:
+                        states, actions, rewards, next_states, dones, idx, weights = batch
+                        td_errors = agent.trainer.train_step(states, actions, rewards, next_states, dones, weights)
+                        with agent.memory_lock:
+                            agent.memory.update_priorities(idx, td_errors)
+                    else:
+                        agent.trainer.train_step(*batch)
+                    self.updates += 1
+                    if self.updates % self.publish_every == 0:
+                        agent.policy.sync()
+        except Exception as e:
+            self.error = e
+
+    def after_step(self, state, action, reward, next_state, done):
+        # the transition is in replay already, the learner picks it up on its own
+        self.steps += 1
+        if self.error is not None:
+            raise RuntimeError('the learner thread failed') from self.error
+
+    def end_game(self):
+        pass
+
+    def wait(self):
+        pass
+
+    def paused(self):
+        return self._update_lock
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.agent.policy.sync()
@@ -0,0 +1,112 @@
+import time
+import struct
+import atexit
+import numpy as np
+
+# file: HEADER once, then per episode EPISODE followed by n_steps uint8 actions and n_steps int8 rewards
+MAGIC = b'TRJ1'
+HEADER = struct.Struct('<4sBHH')  # magic, action_size, w, h
+EPISODE = struct.Struct('<IIiI')  # episode seed, n_steps, final score, digest of the final state
+
+
+class TrajectoryRecorder:
+    # collects the action indices and rewards of the running episode, writes it at end_episode
+    # a game reset with the episode seed and fed the same actions reproduces the episode exactly
+
+    def __init__(self, path, action_size, w, h):
+        self.path = path
+        self.actions = []
+        self.rewards = []
+        self.n_episodes = 0
+        new_file = True
+        try:
+            with open(path, 'rb') as f:
+                new_file = not f.read(1)
+        except FileNotFoundError:
+            pass
+        # append mode: a resumed run continues the same file, cut back to its checkpoint by load_checkpoint
+        self._file = open(path, 'ab')
+        if new_file:
+            self._file.write(HEADER.pack(MAGIC, action_size, w, h))
+        else:
+            _check_header(read_header(path), action_size, w, h)
+        atexit.register(self.close)
+
+    def record(self, action, reward):
+        # action: one-hot move as passed to play_step
+        self.actions.append(action.index(1) if isinstance(action, list) else int(np.argmax(action)))
+        self.rewards.append(reward)
+
+    def end_episode(self, game):
+        # game: the finished episode, before it is reset
+        self._file.write(EPISODE.pack(game.episode_seed, len(self.actions), game.score, game.digest()))
+        self._file.write(np.array(self.actions, dtype=np.uint8).tobytes())
+        self._file.write(np.array(self.rewards, dtype=np.int8).tobytes())
+        self.actions.clear()
+        self.rewards.clear()
+        self.n_episodes += 1
+
+    def tell(self):
+        # size of the file up to the last finished episode, stored in checkpoints
+        self._file.flush()
+        return self._file.tell()
+
+    def close(self):
+        if not self._file.closed:
+            # a partially recorded episode has no end, it is dropped
+            self._file.close()
+
+
+def _check_header(header, action_size, w, h):
+    if header != (action_size, w, h):
+        raise ValueError(f'trajectory file is for action_size, w, h = {header}, expected {(action_size, w, h)}')
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        magic, action_size, w, h = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f'{path} is not a trajectory file')
+    return action_size, w, h
+
+
+def read_trajectories(path):
+    # yields (seed, actions, rewards, score, digest) per episode, actions and rewards as numpy arrays
+    with open(path, 'rb') as f:
+        data = f.read()
+    offset = HEADER.size
+    while offset + EPISODE.size <= len(data):
+        seed, n_steps, score, digest = EPISODE.unpack_from(data, offset)
+        offset += EPISODE.size
+        actions = np.frombuffer(data, dtype=np.uint8, count=n_steps, offset=offset)
+        rewards = np.frombuffer(data, dtype=np.int8, count=n_steps, offset=offset + n_steps)
+        offset += 2 * n_steps
+        yield seed, actions, rewards, score, digest
+
+
+def replay_trajectories(path, game, action_size):
+    # re-simulates every recorded episode on a headless game, checks rewards and end step by step,
+    # then score and final state
+    _check_header(read_header(path), action_size, game.w, game.h)
+    moves = np.eye(action_size, dtype=int).tolist()
+    n_episodes = 0
+    n_steps = 0
+    start = time.perf_counter()
+    for seed, actions, rewards, score, digest in read_trajectories(path):
+        if len(actions) and actions.max() >= action_size:
+            raise ValueError(f'episode {n_episodes} (seed {seed}) has action {actions.max()} >= {action_size}')
+        game.reset(seed)
+        last = len(actions) - 1
+        for step, (action, expected) in enumerate(zip(actions.tolist(), rewards.tolist())):
+            reward, done, game_score = game.play_step(moves[action])
+            if reward != expected or done != (step == last):
+                raise ValueError(f'episode {n_episodes} (seed {seed}) diverges at step {step}: '
+                                 f'reward {reward}, done {done}, recorded reward {expected}, done {step == last}')
+        if game_score != score:
+            raise ValueError(f'episode {n_episodes} (seed {seed}) ends with score {game_score}, recorded {score}')
+        if game.digest() != digest:
+            raise ValueError(f'episode {n_episodes} (seed {seed}) ends in a different state than recorded')
+        n_episodes += 1
+        n_steps += len(actions)
+    elapsed = time.perf_counter() - start
+    return {'episodes': n_episodes, 'steps': n_steps, 'steps_per_sec': n_steps / elapsed if elapsed else 0.0}
@@ -1,3 +1,4 @@
-from .main import SnakeGame
+from .snake import SnakeGameAI, Direction
+from .snake_env import SnakeEnv
 
-__all__ = [SnakeGame]
\ No newline at end of file
+__all__ = ['SnakeGameAI', 'Direction', 'SnakeEnv']
@@ -1,140 +1,85 @@
-import torch
-import random
 import numpy as np
-from collections import deque
-from snake import SnakeGameAI, Direction, Point, BLOCK_SIZE
-from model import Linear_QNet, QTrainer
-from helper import plot
-
-MAX_MEMORY = 100_000
-BATCH_SIZE = 1000
-LR = 0.001
-
-
-class Agent:
-
-    def __init__(self):
-        self.n_games = 0
-        self.epsilon = 0
-        self.gamma = 0.9
-        self.memory = deque(maxlen=MAX_MEMORY)
-        self.model = Linear_QNet(13, 256, 3)
-        self.trainer = QTrainer(self.model, lr=LR, gamma=self.gamma)
-
-    def get_state(self, game):
-        head = game.snake[0]
-        point_l = Point(head.x - BLOCK_SIZE, head.y)
-        point_r = Point(head.x + BLOCK_SIZE, head.y)
-        point_u = Point(head.x, head.y - BLOCK_SIZE)
-        point_d = Point(head.x, head.y + BLOCK_SIZE)
-
-        dir_l = game.direction == Direction.LEFT
-        dir_r = game.direction == Direction.RIGHT
-        dir_u = game.direction == Direction.UP
-        dir_d = game.direction == Direction.DOWN
-
-        state = [
-            # Danger straight
-            (dir_r and game.is_collision(point_r)) or
-            (dir_l and game.is_collision(point_l)) or
-            (dir_u and game.is_collision(point_u)) or
-            (dir_d and game.is_collision(point_d)),
-
-            # Danger right
-            (dir_u and game.is_collision(point_r)) or
-            (dir_d and game.is_collision(point_l)) or
-            (dir_l and game.is_collision(point_u)) or
-            (dir_r and game.is_collision(point_d)),
-
-            # Danger left
-            (dir_d and game.is_collision(point_r)) or
-            (dir_u and game.is_collision(point_l)) or
-            (dir_r and game.is_collision(point_u)) or
-            (dir_l and game.is_collision(point_d)),
-
-            # Move direction
-            dir_l,
-            dir_r,
-            dir_u,
-            dir_d,
-
-            # Food location
-            game.food.x < game.head.x,  # food left
-            game.food.x > game.head.x,  # food right
-            game.food.x == game.head.x,
-            game.food.y < game.head.y,  # food up
-            game.food.y > game.head.y,  # food down
-            game.food.y == game.head.y
-        ]
-        return np.array(state, dtype=int)
-
-    def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))  # popleft if MAX_MEMORY is reached
-
-    def train_long_memory(self):
-        if len(self.memory) > BATCH_SIZE:
-            mini_sample = random.sample(self.memory, BATCH_SIZE)  # list of tuples
-        else:
-            mini_sample = self.memory
-
-        states, actions, rewards, next_states, dones = zip(*mini_sample)
-        self.trainer.train_step(states, actions, rewards, next_states, dones)
-
-    def train_short_memory(self, state, action, reward, next_state, done):
-        self.trainer.train_step(state, action, reward, next_state, done)
-
-    def get_action(self, state):
-        # random moves: tradeoff exploration / exploitation
-        self.epsilon = 80 - self.n_games
-        final_move = [0, 0, 0]
-        if random.randint(0, 200) < self.epsilon:
-            move = random.randint(0, 2)
-            final_move[move] = 1
+from rl_core import agent as core
+from rl_core.model import ConvQNet
+from rl_core.trajectory import replay_trajectories, read_header
+from .snake import SnakeGameAI
+from .features import game_state, valid_states, extract_grids, game_arrays, STATE_SIZE, GRID_CHANNELS
+
+GRID_MAX_MEMORY = 20_000  # a grid state of the default board takes 3 KB instead of 52 bytes
+
+
+class Agent(core.Agent):
+
+    def __init__(self, prioritized=False, inference='numpy', packed=False, memory_size=None, seed=None,
+                 observation='features', grid_shape=(24, 32)):
+        # observation: 'features' (13 binary danger/direction/food features, Linear_QNet)
+        # or 'grid' (the whole board of grid_shape (rows, cols) cells as uint8 channels, ConvQNet)
+        self.observation = observation
+        if self.observation == 'grid':
+            if memory_size is None:
+                memory_size = GRID_MAX_MEMORY
+            if inference in ('numpy', 'table'):
+                # both only work with the 13 features of Linear_QNet
+                inference = 'torch'
+            super().__init__((GRID_CHANNELS,) + tuple(grid_shape), 3, 80, prioritized, inference, packed,
+                             memory_size, seed, np.uint8)
         else:
-            state0 = torch.tensor(state, dtype=torch.float)
-            prediction = self.model(state0)
-            move = torch.argmax(prediction).item()
-            final_move[move] = 1
-        return final_move
+            super().__init__(STATE_SIZE, 3, 80, prioritized, inference, packed, memory_size, seed)
 
+    def build_model(self):
+        if self.observation == 'grid':
+            return ConvQNet(GRID_CHANNELS, *self.state_shape[1:], 3)
+        return super().build_model()
 
-def train():
-    plot_scores = []
-    plot_mean_scores = []
-    total_score = 0
-    record = 0
-    agent = Agent()
-    game = SnakeGameAI()
-    while True:
-        # get old state
-        state_old = agent.get_state(game)
-        # get move
-        final_move = agent.get_action(state_old)
-        # perform move and get new state
-        reward, done, score = game.play_step(final_move)
-        state_new = agent.get_state(game)
+    def valid_states(self):
+        # 288 possible states
+        return valid_states()
 
-        agent.train_short_memory(state_old, final_move, reward, state_new, done)
-        agent.remember(state_old, final_move, reward, state_new, done)
-
-        if done:
-            # train long memory
-            game.reset()
-            agent.n_games += 1
-            agent.train_long_memory()
+    def get_state(self, game):
+        if self.observation == 'grid':
+            return extract_grids(*game_arrays([game]))[0]
 
-            if score > record:
-                record = score
-                agent.model.save()
+        return game_state(game)
 
-            print('Game', agent.n_games, 'Score', score, 'Record:', record)
 
-            plot_scores.append(score)
-            total_score += score
-            mean_score = total_score / agent.n_games
-            plot_mean_scores.append(mean_score)
-            plot(plot_scores, plot_mean_scores)
+def train(headless=False, render_every=0, prioritized=False, plot=True, run_name=None, resume=False,
+          max_games=None, timing=True, profile_games=None, inference='numpy',
+          packed_replay=False, memory_size=None, seed=None, trajectory=None, observation='features',
+          w=640, h=480, train_every=None, gradient_steps=1, batch_size=core.BATCH_SIZE, background_learner=False,
+          async_learner=False, publish_every=core.PUBLISH_EVERY, max_updates_per_step=None):
+    # seed: one seed for the whole run, the game gets its own stream
+    game = SnakeGameAI(w, h, headless=headless, render_every=render_every, seed=None if seed is None else seed + 1)
+    agent = Agent(prioritized=prioritized, inference=inference, packed=packed_replay, memory_size=memory_size,
+                  seed=seed, observation=observation, grid_shape=(game.rows, game.cols))
+    core.train(agent, game, plot=plot, run_name=run_name, resume=resume, max_games=max_games, timing=timing,
+               profile_games=profile_games, trajectory=trajectory, train_every=train_every,
+               gradient_steps=gradient_steps, batch_size=batch_size, background_learner=background_learner,
+               async_learner=async_learner, publish_every=publish_every, max_updates_per_step=max_updates_per_step)
 
 
 if __name__ == '__main__':
-    train()
+    # python -m snake_RL.agent
+    parser = core.make_parser()
+    parser.add_argument('--render-every', type=int, default=0, help='with --headless, show every N-th game')
+    parser.add_argument('--observation', choices=('features', 'grid'), default='features',
+                        help=f'13 hand-made features or the whole board for a convolutional network, '
+                             f'which keeps {GRID_MAX_MEMORY} transitions by default')
+    parser.add_argument('--board', type=int, nargs=2, default=(640, 480), metavar=('W', 'H'),
+                        help='board size in pixels, multiples of 2 * BLOCK_SIZE')
+    parser.add_argument('--inference', choices=('numpy', 'torch', 'script', 'table'), default='numpy',
+                        help='how greedy moves are computed, table refreshes once per game')
+    args = parser.parse_args()
+    if args.replay:
+        # the board size the trajectory was recorded on
+        _, w, h = read_header(args.replay)
+        print(replay_trajectories(args.replay, SnakeGameAI(w, h, headless=True), 3))
+    else:
+        train(headless=args.headless, render_every=args.render_every, prioritized=args.prioritized,
+              plot=not args.no_plot, run_name=args.run_name, resume=args.resume,
+              timing=not args.no_timing, profile_games=args.profile_games,
+              inference=args.inference, packed_replay=args.packed_replay, memory_size=args.memory_size,
+              seed=args.seed, trajectory=args.trajectory, observation=args.observation, w=args.board[0],
+              h=args.board[1], train_every=args.train_every, gradient_steps=args.gradient_steps,
+              batch_size=args.batch_size, background_learner=args.background_learner,
+              async_learner=args.async_learner, publish_every=args.publish_every,
+              max_updates_per_step=args.max_updates_per_step)
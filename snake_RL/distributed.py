@@ -0,0 +1,210 @@
+import time
+import queue
+import numpy as np
+import torch
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from rl_core.model import Linear_QNet
+from rl_core.replay import ReplayBuffer
+from rl_core.agent import MAX_MEMORY, BATCH_SIZE
+from .snake import SnakeGameAI
+from .agent import Agent
+
+N_ACTORS = max(1, mp.cpu_count() - 1)
+SEND_EVERY = 64  # transitions an actor collects before writing them to the shared buffer
+SYNC_EVERY = 200  # actor env steps between checks for new weights
+PUBLISH_EVERY = 20  # learner updates between weight publications
+REPORT_EVERY = 5  # seconds between throughput reports
+
+
+class SharedReplayBuffer(ReplayBuffer):
+    # ReplayBuffer whose arrays live in shared memory, written by actors and sampled by the learner
+
+    def __init__(self, capacity, state_size, action_size):
+        self.capacity = capacity
+        self.rng = np.random.default_rng()
+        self.lock = mp.Lock()
+        self._position = mp.Value('q', 0, lock=False)
+        self._size = mp.Value('q', 0, lock=False)
+        self._pushed = mp.Value('q', 0, lock=False)
+        self._specs = {
+            'states': ((capacity, state_size), np.float32),
+            'actions': ((capacity, action_size), np.int64),
+            'rewards': ((capacity,), np.float32),
+            'next_states': ((capacity, state_size), np.float32),
+            'dones': ((capacity,), np.bool_),
+        }
+        self._blocks = {}
+        for name, (shape, dtype) in self._specs.items():
+            nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            self._blocks[name] = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._attach()
+
+    def _attach(self):
+        for name, (shape, dtype) in self._specs.items():
+            setattr(self, name, np.ndarray(shape, dtype=dtype, buffer=self._blocks[name].buf))
+
+    def __getstate__(self):
+        # only the block names travel to spawned processes, the arrays are re-attached there
+        state = self.__dict__.copy()
+        state['_blocks'] = {name: block.name for name, block in self._blocks.items()}
+        for name in self._specs:
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._blocks = {name: shared_memory.SharedMemory(name=block) for name, block in self._blocks.items()}
+        self._attach()
+
+    @property
+    def position(self):
+        return self._position.value
+
+    @position.setter
+    def position(self, value):
+        self._position.value = value
+
+    @property
+    def size(self):
+        return self._size.value
+
+    @size.setter
+    def size(self, value):
+        self._size.value = value
+
+    @property
+    def pushed(self):
+        return self._pushed.value
+
+    def push_many(self, transitions):
+        states, actions, rewards, next_states, dones = zip(*transitions)
+        n = len(transitions)
+        with self.lock:
+            idx = (self.position + np.arange(n)) % self.capacity
+            self.states[idx] = states
+            self.actions[idx] = actions
+            self.rewards[idx] = rewards
+            self.next_states[idx] = next_states
+            self.dones[idx] = dones
+            self.position = (self.position + n) % self.capacity
+            self.size = min(self.size + n, self.capacity)
+            self._pushed.value += n
+
+    def sample(self, batch_size):
+        # the copy is taken under the lock so actors never hand out half-written transitions
+        with self.lock:
+            return super().sample(batch_size)
+
+    def close(self, unlink=False):
+        for block in self._blocks.values():
+            block.close()
+            if unlink:
+                block.unlink()
+
+
+def _pull_weights(model, shared_model, lock):
+    with lock:
+        model.load_state_dict(shared_model.state_dict())
+
+
+def _actor(actor_id, buffer, shared_model, weights_lock, version, scores, stop):
+    torch.set_num_threads(1)
+    seed = time.time_ns() + 2 * actor_id
+    scores.cancel_join_thread()  # never block shutdown on unread scores
+
+    # the actor only sees new weights at a pull, so a lookup table is exact between pulls
+    agent = Agent(inference='table', seed=seed)
+    game = SnakeGameAI(headless=True, seed=seed + 1)
+    local_version = -1
+    pending = []
+    steps = 0
+    while not stop.is_set():
+        if steps % SYNC_EVERY == 0 and version.value != local_version:
+            local_version = version.value
+            _pull_weights(agent.model, shared_model, weights_lock)
+            agent.policy.sync()
+
+        state_old = agent.get_state(game)
+        final_move = agent.get_action(state_old)
+        reward, done, score = game.play_step(final_move)
+        state_new = agent.get_state(game)
+        pending.append((state_old, final_move, reward, state_new, done))
+        steps += 1
+
+        if len(pending) >= SEND_EVERY:
+            buffer.push_many(pending)
+            pending.clear()
+
+        if done:
+            game.reset()
+            agent.n_games += 1
+            scores.put((actor_id, agent.n_games, score))
+
+    buffer.close()
+
+
+def train_distributed(n_actors=N_ACTORS):
+    torch.set_num_threads(max(1, mp.cpu_count() - n_actors))
+    agent = Agent()
+    trainer = agent.trainer
+    buffer = SharedReplayBuffer(MAX_MEMORY, 13, 3)
+
+    shared_model = Linear_QNet(13, 256, 3)
+    shared_model.load_state_dict(agent.model.state_dict())
+    shared_model.share_memory()
+    weights_lock = mp.Lock()
+    version = mp.Value('q', 0)
+    scores = mp.Queue()
+    stop = mp.Event()
+
+    actors = [mp.Process(target=_actor, args=(i, buffer, shared_model, weights_lock, version, scores, stop), daemon=True)
+              for i in range(n_actors)]
+    for actor in actors:
+        actor.start()
+
+    n_games = 0
+    record = 0
+    updates = 0
+    last_report = time.time()
+    last_pushed = 0
+    last_updates = 0
+    try:
+        while True:
+            if len(buffer) < BATCH_SIZE:
+                time.sleep(0.01)
+            else:
+                states, actions, rewards, next_states, dones = buffer.sample(BATCH_SIZE)
+                trainer.train_step(states, actions, rewards, next_states, dones)
+                updates += 1
+                if updates % PUBLISH_EVERY == 0:
+                    with weights_lock:
+                        shared_model.load_state_dict(agent.model.state_dict())
+                    version.value += 1
+
+            while True:
+                try:
+                    actor_id, actor_games, score = scores.get_nowait()
+                except queue.Empty:
+                    break
+                n_games += 1
+                if score > record:
+                    record = score
+                    agent.model.save()
+                print('Game', n_games, 'Actor', actor_id, 'Score', score, 'Record:', record)
+
+            now = time.time()
+            if now - last_report >= REPORT_EVERY:
+                pushed = buffer.pushed
+                print('Env steps/s', round((pushed - last_pushed) / (now - last_report)),
+                      'Updates/s', round((updates - last_updates) / (now - last_report), 1))
+                last_report, last_pushed, last_updates = now, pushed, updates
+    finally:
+        stop.set()
+        for actor in actors:
+            actor.join(timeout=5)
+        buffer.close(unlink=True)
+
+
+if __name__ == '__main__':
+    train_distributed()
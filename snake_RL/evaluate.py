@@ -0,0 +1,115 @@
+import json
+import time
+import argparse
+import numpy as np
+import torch
+from rl_core.model import Linear_QNet, ConvQNet
+from .snake import BLOCK_SIZE
+from .vector_snake import VectorSnakeEnv
+from .features import extract_states, extract_grids, STATE_SIZE, GRID_CHANNELS
+
+PERCENTILES = (5, 25, 50, 75, 95)
+HISTOGRAM_BINS = 20
+
+
+def evaluate(model, n_episodes=1000, n_envs=256, seed=0, w=640, h=480, observation='features'):
+    # greedy episodes on the batched env: no exploration, no learning, same seed -> same episodes
+    n_envs = min(n_envs, n_episodes)
+    env = VectorSnakeEnv(n_envs, w, h, seed=seed)
+    extract = extract_grids if observation == 'grid' else extract_states
+    # every board plays a fixed number of episodes, so long episodes are not cut off in favour of short ones
+    quota = np.full(n_envs, n_episodes // n_envs)
+    quota[:n_episodes % n_envs] += 1
+    completed = np.zeros(n_envs, dtype=np.int64)
+    scores = []
+    lengths = []
+
+    steps = 0
+    start = time.perf_counter()
+    with torch.inference_mode():
+        while (completed < quota).any():
+            states = extract(env.heads, env.directions, env.foods, env.occupancy)
+            actions = model(torch.from_numpy(states).float()).argmax(dim=1).numpy()
+            # frame count of the episodes that end in this step, read before step() resets them
+            episode_lengths = env.frame_iteration + 1
+            _, dones, final_scores = env.step(actions)
+            steps += n_envs
+
+            counted = np.flatnonzero(dones & (completed < quota))
+            completed[counted] += 1
+            scores.extend(final_scores[counted])
+            lengths.extend(episode_lengths[counted])
+    elapsed = time.perf_counter() - start
+
+    scores = np.array(scores)
+    lengths = np.array(lengths)
+    results = {
+        'episodes': len(scores),
+        'seed': seed,
+        'mean_score': float(scores.mean()),
+        'std_score': float(scores.std()),
+        'min_score': int(scores.min()),
+        'max_score': int(scores.max()),
+        'mean_length': float(lengths.mean()),
+        'env_steps_per_sec': steps / elapsed,
+        'time': elapsed,
+    }
+    for q, value in zip(PERCENTILES, np.percentile(scores, PERCENTILES)):
+        results[f'p{q}_score'] = float(value)
+    for q, value in zip(PERCENTILES, np.percentile(lengths, PERCENTILES)):
+        results[f'p{q}_length'] = float(value)
+    results['score_counts'] = np.bincount(scores).tolist()
+    return results
+
+
+def load_model(path, observation='features', w=640, h=480):
+    if observation == 'grid':
+        model = ConvQNet(GRID_CHANNELS, h // BLOCK_SIZE, w // BLOCK_SIZE, 3)
+    else:
+        model = Linear_QNet(STATE_SIZE, 256, 3)
+    model.load_state_dict(torch.load(path))
+    model.eval()
+    return model
+
+
+def print_results(results):
+    for name, value in results.items():
+        if name == 'score_counts':
+            continue
+        print(f'{name:>20}', f'{value:>12.2f}' if isinstance(value, float) else f'{value:>12}')
+    # score distribution as a text histogram of at most HISTOGRAM_BINS rows
+    counts = np.array(results['score_counts'])
+    width = -(-len(counts) // HISTOGRAM_BINS)
+    counts = np.pad(counts, (0, -len(counts) % width)).reshape(-1, width).sum(axis=1)
+    scale = 50 / counts.max()
+    print('score distribution')
+    for i, count in enumerate(counts):
+        scores = f'{i * width}-{(i + 1) * width - 1}' if width > 1 else str(i)
+        print(f'{scores:>20} {count:>8} {"#" * round(count * scale)}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('model', nargs='?',
+                        help='state dict saved by Linear_QNet.save or ConvQNet.save, default model/model.pth '
+                             'or model/conv_model.pth for grid')
+    parser.add_argument('--observation', choices=('features', 'grid'), default='features',
+                        help='what the model was trained on, see agent.py')
+    parser.add_argument('--board', type=int, nargs=2, default=(640, 480), metavar=('W', 'H'),
+                        help='board size in pixels the model was trained on, as in agent.py')
+    parser.add_argument('--episodes', type=int, default=1000)
+    parser.add_argument('--envs', type=int, default=256, help='boards stepped together')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--threads', type=int, default=1, help='torch threads for the batched forward pass')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    path = args.model or ('model/conv_model.pth' if args.observation == 'grid' else 'model/model.pth')
+    w, h = args.board
+    model = load_model(path, args.observation, w, h)
+    results = evaluate(model, args.episodes, args.envs, args.seed, w, h, observation=args.observation)
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
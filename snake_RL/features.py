@@ -0,0 +1,132 @@
+import itertools
+import numpy as np
+from .snake import Direction, Point, BLOCK_SIZE
+from .vector_snake import DIRECTION_DELTAS, RIGHT, DOWN, LEFT, UP
+
+STATE_SIZE = 13
+GRID_CHANNELS = 4  # body, head, food, the cell the snake moves into next
+DIRECTION_CODES = {Direction.RIGHT: RIGHT, Direction.DOWN: DOWN, Direction.LEFT: LEFT, Direction.UP: UP}
+
+
+def game_state(game, dtype=int):
+    # the 13 features of one SnakeGameAI board, what Agent.get_state returns; extract_states is the batched version
+    head = game.snake[0]
+    point_l = Point(head.x - BLOCK_SIZE, head.y)
+    point_r = Point(head.x + BLOCK_SIZE, head.y)
+    point_u = Point(head.x, head.y - BLOCK_SIZE)
+    point_d = Point(head.x, head.y + BLOCK_SIZE)
+
+    dir_l = game.direction == Direction.LEFT
+    dir_r = game.direction == Direction.RIGHT
+    dir_u = game.direction == Direction.UP
+    dir_d = game.direction == Direction.DOWN
+
+    state = [
+        # Danger straight
+        (dir_r and game.is_collision(point_r)) or
+        (dir_l and game.is_collision(point_l)) or
+        (dir_u and game.is_collision(point_u)) or
+        (dir_d and game.is_collision(point_d)),
+
+        # Danger right
+        (dir_u and game.is_collision(point_r)) or
+        (dir_d and game.is_collision(point_l)) or
+        (dir_l and game.is_collision(point_u)) or
+        (dir_r and game.is_collision(point_d)),
+
+        # Danger left
+        (dir_d and game.is_collision(point_r)) or
+        (dir_u and game.is_collision(point_l)) or
+        (dir_r and game.is_collision(point_u)) or
+        (dir_l and game.is_collision(point_d)),
+
+        # Move direction
+        dir_l,
+        dir_r,
+        dir_u,
+        dir_d,
+
+        # Food location
+        game.food.x < game.head.x,  # food left
+        game.food.x > game.head.x,  # food right
+        game.food.x == game.head.x,
+        game.food.y < game.head.y,  # food up
+        game.food.y > game.head.y,  # food down
+        game.food.y == game.head.y
+    ]
+    return np.array(state, dtype=dtype)
+
+
+def extract_states(heads, directions, foods, occupancy):
+    # same 13 features as Agent.get_state for a whole batch of boards
+    # heads, foods: (n, 2) cells as (x, y); directions: (n,) codes from vector_snake; occupancy: (n, rows, cols)
+    n = len(heads)
+    rows, cols = occupancy.shape[1:]
+    envs = np.arange(n)
+    states = np.zeros((n, STATE_SIZE), dtype=np.float32)
+
+    # danger straight, right, left
+    for i, turn in enumerate((0, 1, -1)):
+        points = heads + DIRECTION_DELTAS[(directions + turn) % 4]
+        x = points[:, 0]
+        y = points[:, 1]
+        outside = (x < 0) | (x >= cols) | (y < 0) | (y >= rows)
+        inside = ~outside
+        danger = outside
+        danger[inside] = occupancy[envs[inside], y[inside], x[inside]]
+        states[:, i] = danger
+
+    # move direction
+    states[:, 3] = directions == LEFT
+    states[:, 4] = directions == RIGHT
+    states[:, 5] = directions == UP
+    states[:, 6] = directions == DOWN
+
+    # food location
+    states[:, 7] = foods[:, 0] < heads[:, 0]  # food left
+    states[:, 8] = foods[:, 0] > heads[:, 0]  # food right
+    states[:, 9] = foods[:, 0] == heads[:, 0]
+    states[:, 10] = foods[:, 1] < heads[:, 1]  # food up
+    states[:, 11] = foods[:, 1] > heads[:, 1]  # food down
+    states[:, 12] = foods[:, 1] == heads[:, 1]
+    return states
+
+
+def extract_grids(heads, directions, foods, occupancy):
+    # the whole boards as (n, GRID_CHANNELS, rows, cols) uint8 images, from the same arrays as extract_states
+    n = len(heads)
+    rows, cols = occupancy.shape[1:]
+    envs = np.arange(n)
+    grids = np.zeros((n, GRID_CHANNELS, rows, cols), dtype=np.uint8)
+    grids[:, 0] = occupancy
+    # after a collision the head and the cell ahead may be off the board
+    for channel, points in ((1, heads), (3, heads + DIRECTION_DELTAS[directions])):
+        x = points[:, 0]
+        y = points[:, 1]
+        inside = (x >= 0) & (x < cols) & (y >= 0) & (y < rows)
+        grids[envs[inside], channel, y[inside], x[inside]] = 1
+    grids[envs, 2, foods[:, 1], foods[:, 0]] = 1
+    return grids
+
+
+def valid_states():
+    # every state extract_states and Agent.get_state can produce: any danger bits, exactly one direction,
+    # exactly one of left/right/same column and one of up/down/same row for the food -> 8 * 4 * 3 * 3 = 288
+    one_hot_4 = np.eye(4, dtype=np.int64)
+    one_hot_3 = np.eye(3, dtype=np.int64)
+    states = [np.concatenate([danger, direction, food_x, food_y])
+              for danger in itertools.product((0, 1), repeat=3)
+              for direction in one_hot_4
+              for food_x in one_hot_3
+              for food_y in one_hot_3]
+    return np.array(states, dtype=np.int64)
+
+
+def game_arrays(games):
+    # array representation of a list of SnakeGameAI boards, in the layout extract_states expects
+    heads = np.array([(int(g.head.x) // BLOCK_SIZE, int(g.head.y) // BLOCK_SIZE) for g in games], dtype=np.int64)
+    directions = np.array([DIRECTION_CODES[g.direction] for g in games], dtype=np.int64)
+    foods = np.array([(int(g.food.x) // BLOCK_SIZE, int(g.food.y) // BLOCK_SIZE) for g in games], dtype=np.int64)
+    occupancy = np.stack([g.occupancy for g in games])
+    return heads, directions, foods, occupancy
+
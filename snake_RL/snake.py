@@ -1,7 +1,8 @@
 import pygame
+import zlib
 import random
 from enum import Enum
-from collections import namedtuple
+from collections import namedtuple, deque
 import numpy as np
 
 pygame.init()
@@ -28,75 +29,160 @@ SPEED = 20
 
 class SnakeGameAI:
 
-    def __init__(self, w=640, h=480):
+    def __init__(self, w=640, h=480, headless=False, render_every=0, seed=None):
+        # headless: no window, no event polling, no rendering and no frame limit
+        # render_every: in headless mode still show every N-th episode (0 - never)
+        # seed: seeds the generator of episode seeds, None - seeded from the OS
         self.w = w
         self.h = h
+        self.cols = w // BLOCK_SIZE
+        self.rows = h // BLOCK_SIZE
+        self._all_cells = list(range(self.rows * self.cols))
+        self.headless = headless
+        self.render_every = render_every
+        self.display = None
+        self.clock = None
+        self.n_episodes = 0
+        self.render = False
+        self.seeds = random.Random(seed)
+        if not self.headless:
+            self._init_display()
+        self.reset()
+
+    def _init_display(self):
         self.display = pygame.display.set_mode((self.w, self.h))
         pygame.display.set_caption('Snake game')
         self.clock = pygame.time.Clock()
-        self.reset()
 
-    def reset(self):
+    def _is_render_episode(self):
+        if not self.headless:
+            return True
+        return self.render_every > 0 and self.n_episodes % self.render_every == 0
+
+    def reset(self, seed=None):
+        # every episode draws from its own generator, so (episode_seed, actions) replays it exactly
+        self.episode_seed = self.seeds.getrandbits(32) if seed is None else seed
+        self.rng = random.Random(self.episode_seed)
         self.direction = Direction.RIGHT
         self.head = Point(self.w / 2, self.h / 2)
-        self.snake = [self.head,
-                      Point(self.head.x - BLOCK_SIZE, self.head.y),
-                      Point(self.head.x - (2 * BLOCK_SIZE), self.head.y),
-                      Point(self.head.x - (3 * BLOCK_SIZE), self.head.y)]
+        self.snake = deque([self.head,
+                            Point(self.head.x - BLOCK_SIZE, self.head.y),
+                            Point(self.head.x - (2 * BLOCK_SIZE), self.head.y),
+                            Point(self.head.x - (3 * BLOCK_SIZE), self.head.y)])
+        # free-cell index over cells row * cols + col: free_cells holds every empty cell once,
+        # free_pos[cell] is its position in free_cells, -1 while the snake covers it
+        self.free_cells = self._all_cells.copy()
+        self.free_pos = self._all_cells.copy()
+        for pt in self.snake:
+            self._set_cell(pt, True)
 
         self.score = 0
         self.food = None
         self._place_food()
         self.frame_iteration = 0
 
+        self.n_episodes += 1
+        self.render = self._is_render_episode()
+        if self.render and self.display is None:
+            self._init_display()
+
     def _place_food(self):
-        x = random.randint(0, (self.w - BLOCK_SIZE) // BLOCK_SIZE) * BLOCK_SIZE
-        y = random.randint(0, (self.h - BLOCK_SIZE) // BLOCK_SIZE) * BLOCK_SIZE
-        self.food = Point(x, y)
-        if self.food in self.snake:
-            self._place_food()
+        # one uniform draw over the free cells, whatever the length of the snake
+        if not self.free_cells:
+            # the snake covers the whole board: the food stays where it was eaten, the next move collides anyway
+            return
+        row, col = divmod(self.free_cells[self.rng.randrange(len(self.free_cells))], self.cols)
+        self.food = Point(col * BLOCK_SIZE, row * BLOCK_SIZE)
+
+    def digest(self):
+        # checksum of the board, a replay compares it to check that it reached exactly the recorded state
+        return zlib.crc32(repr((list(self.snake), self.food, self.direction.value, self.score)).encode())
 
     def play_step(self, action):
         self.frame_iteration += 1
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                quit()
+        if self.render:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    quit()
 
         self._move(action)
-        self.snake.insert(0, self.head)
+        # check before the head is added: the old tail still counts, as with `head in snake[1:]`
+        collision = self.is_collision()
+        self.snake.appendleft(self.head)
 
         reward = 0
         game_over = False
-        if self.is_collision() or self.frame_iteration > 100 * len(self.snake):
+        if collision or self.frame_iteration > 100 * len(self.snake):
+            # after a collision the head is outside or on a cell that is taken already
+            if not collision:
+                self._set_cell(self.head, True)
             game_over = True
             reward = -10
             return reward, game_over, self.score
 
         if self.head == self.food:
+            self._set_cell(self.head, True)
             self.score += 1
             reward = 10
             self._place_food()
         else:
-            self.snake.pop()
+            self._move_cell(self.snake.pop(), self.head)
 
-        self._update_ui()
-        self.clock.tick(SPEED)
+        if self.render:
+            self._update_ui()
+            self.clock.tick(SPEED)
         return reward, game_over, self.score
 
     def is_collision(self, pt=None):
+        # pt=None checks the new head before play_step adds it to the body
         if pt is None:
             pt = self.head
 
-        if pt.x > self.w - BLOCK_SIZE or pt.x < 0 or pt.y > self.h - BLOCK_SIZE or pt.y < 0:
+        if self._is_outside(pt):
             return True
-        if pt in self.snake[1:]:
-            return True
-        return False
+        return self._get_cell(pt)
+
+    def _is_outside(self, pt):
+        return pt.x > self.w - BLOCK_SIZE or pt.x < 0 or pt.y > self.h - BLOCK_SIZE or pt.y < 0
+
+    @property
+    def occupancy(self):
+        # occupancy[row][col] is True for every cell covered by the snake, built from the free-cell index on request
+        return (np.array(self.free_pos) < 0).reshape(self.rows, self.cols)
+
+    def _get_cell(self, pt):
+        return self.free_pos[int(pt.y) // BLOCK_SIZE * self.cols + int(pt.x) // BLOCK_SIZE] < 0
+
+    def _set_cell(self, pt, value):
+        cell = int(pt.y) // BLOCK_SIZE * self.cols + int(pt.x) // BLOCK_SIZE
+        i = self.free_pos[cell]
+        if (i < 0) == value:
+            # already covered / already free
+            return
+        if value:
+            # swap-remove: the last free cell takes the place of this one
+            last = self.free_cells.pop()
+            if last != cell:
+                self.free_cells[i] = last
+                self.free_pos[last] = i
+            self.free_pos[cell] = -1
+        else:
+            self.free_pos[cell] = len(self.free_cells)
+            self.free_cells.append(cell)
+
+    def _move_cell(self, old, new):
+        # the snake leaves cell `old` and covers the free cell `new`: `old` takes its place in the free-cell index
+        old = int(old.y) // BLOCK_SIZE * self.cols + int(old.x) // BLOCK_SIZE
+        new = int(new.y) // BLOCK_SIZE * self.cols + int(new.x) // BLOCK_SIZE
+        i = self.free_pos[new]
+        self.free_cells[i] = old
+        self.free_pos[old] = i
+        self.free_pos[new] = -1
 
     def is_head_around_by_tail(self):
-        if abs(self.head.x - self.snake[len(self.snake) - 1].x) // BLOCK_SIZE <= 2 \
-                and abs(self.head.y - self.snake[len(self.snake) - 1].y) // BLOCK_SIZE <= 2:
+        if abs(self.head.x - self.snake[-1].x) // BLOCK_SIZE <= 2 \
+                and abs(self.head.y - self.snake[-1].y) // BLOCK_SIZE <= 2:
             return True
         else:
             return False
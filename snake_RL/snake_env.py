@@ -0,0 +1,32 @@
+import numpy as np
+from rl_core.env import GameEnv, Box, SyncVectorEnv, AsyncVectorEnv
+from .snake import SnakeGameAI
+from .features import game_state, extract_grids, game_arrays, STATE_SIZE, GRID_CHANNELS
+
+
+class SnakeEnv(GameEnv):
+    # actions: 0 straight, 1 right turn, 2 left turn, as in Agent.get_action
+    # observation: 'features' - the 13 features of Agent.get_state as float32, 'grid' - the uint8 board of extract_grids
+
+    def __init__(self, w=640, h=480, observation='features', seed=None, headless=True, render_every=0,
+                 max_episode_steps=None):
+        game = SnakeGameAI(w, h, headless=headless, render_every=render_every, seed=seed)
+        self.observation = observation
+        if observation == 'grid':
+            space = Box(0, 1, (GRID_CHANNELS, game.rows, game.cols), 'uint8')
+        elif observation == 'features':
+            space = Box(0, 1, (STATE_SIZE,), 'float32')
+        else:
+            raise ValueError(f'unknown observation {observation!r}')
+        super().__init__(game, space, 3, max_episode_steps)
+
+    def observe(self):
+        if self.observation == 'grid':
+            return extract_grids(*game_arrays([self.game]))[0]
+        return game_state(self.game, np.float32)
+
+
+def make_vector_env(n_envs, asynchronous=False, n_workers=None, **kwargs):
+    # n_envs SnakeEnv(**kwargs); seeds come from reset(seed)
+    env_fns = [lambda: SnakeEnv(**kwargs)] * n_envs
+    return AsyncVectorEnv(env_fns, n_workers) if asynchronous else SyncVectorEnv(env_fns)
@@ -0,0 +1,130 @@
+import numpy as np
+from .snake import BLOCK_SIZE
+
+# direction codes follow the clock wise order used by SnakeGameAI._move: [RIGHT, DOWN, LEFT, UP]
+RIGHT = 0
+DOWN = 1
+LEFT = 2
+UP = 3
+
+# (dx, dy) in cells for every direction code
+DIRECTION_DELTAS = np.array([[1, 0], [0, 1], [-1, 0], [0, -1]], dtype=np.int64)
+# action index [straight, right, left] -> turn
+ACTION_TURNS = np.array([0, 1, -1], dtype=np.int64)
+
+INITIAL_LENGTH = 4
+FOOD_TRIES = 4  # vectorized rejection rounds before a board draws from its list of free cells
+
+
+class VectorSnakeEnv:
+
+    def __init__(self, n_envs, w=640, h=480, seed=None):
+        self.n_envs = n_envs
+        self.w = w
+        self.h = h
+        self.cols = w // BLOCK_SIZE
+        self.rows = h // BLOCK_SIZE
+        self.capacity = self.cols * self.rows
+        self.rng = np.random.default_rng(seed)
+
+        self.heads = np.zeros((n_envs, 2), dtype=np.int64)  # (x, y) in cells
+        self.directions = np.zeros(n_envs, dtype=np.int64)
+        self.foods = np.zeros((n_envs, 2), dtype=np.int64)
+        # body ring buffer: body[i, head_ptr[i]] is the head, the next lengths[i] - 1 cells follow it
+        self.body = np.zeros((n_envs, self.capacity, 2), dtype=np.int64)
+        self.head_ptr = np.zeros(n_envs, dtype=np.int64)
+        self.lengths = np.zeros(n_envs, dtype=np.int64)
+        self.occupancy = np.zeros((n_envs, self.rows, self.cols), dtype=bool)
+        self.scores = np.zeros(n_envs, dtype=np.int64)
+        self.frame_iteration = np.zeros(n_envs, dtype=np.int64)
+
+        self.reset()
+
+    def reset(self, mask=None):
+        if mask is None:
+            mask = np.ones(self.n_envs, dtype=bool)
+        envs = np.flatnonzero(mask)
+        if len(envs) == 0:
+            return
+
+        # same start position as SnakeGameAI.reset: head in the middle, body to the left
+        head_x = int(self.w / 2) // BLOCK_SIZE
+        head_y = int(self.h / 2) // BLOCK_SIZE
+        self.occupancy[envs] = False
+        self.directions[envs] = RIGHT
+        self.heads[envs] = (head_x, head_y)
+        self.head_ptr[envs] = 0
+        self.lengths[envs] = INITIAL_LENGTH
+        for i in range(INITIAL_LENGTH):
+            self.body[envs, i] = (head_x - i, head_y)
+            self.occupancy[envs, head_y, head_x - i] = True
+
+        self.scores[envs] = 0
+        self.frame_iteration[envs] = 0
+        self._place_food(envs)
+
+    def _place_food(self, envs):
+        # rejection sampling for all boards at once, cheap while the snakes are short; keeping a free-cell index
+        # like SnakeGameAI costs more per step than it saves here. Boards still on the snake after FOOD_TRIES
+        # rounds draw uniformly from their free cells, so a nearly full board needs no unbounded retries
+        for _ in range(FOOD_TRIES):
+            if len(envs) == 0:
+                return
+            x = self.rng.integers(0, self.cols, size=len(envs))
+            y = self.rng.integers(0, self.rows, size=len(envs))
+            self.foods[envs, 0] = x
+            self.foods[envs, 1] = y
+            envs = envs[self.occupancy[envs, y, x]]
+
+        for i in envs:
+            free = np.flatnonzero(~self.occupancy[i].ravel())
+            # on a board the snake covers completely the food stays on the last draw, the next move collides anyway
+            if len(free) > 0:
+                row, col = divmod(free[self.rng.integers(len(free))], self.cols)
+                self.foods[i] = (col, row)
+
+    def step(self, actions):
+        # actions: (n_envs,) indices or (n_envs, 3) one-hot [straight, right, left]
+        actions = np.asarray(actions)
+        if actions.ndim == 2:
+            actions = actions.argmax(axis=1)
+
+        envs = np.arange(self.n_envs)
+        self.frame_iteration += 1
+        self.directions = (self.directions + ACTION_TURNS[actions]) % 4
+        heads = self.heads + DIRECTION_DELTAS[self.directions]
+        x = heads[:, 0]
+        y = heads[:, 1]
+
+        # the old tail is still part of the body at this point, exactly as in play_step
+        outside = (x < 0) | (x >= self.cols) | (y < 0) | (y >= self.rows)
+        inside = ~outside
+        collision = outside.copy()
+        collision[inside] = self.occupancy[envs[inside], y[inside], x[inside]]
+
+        self.heads = heads
+        self.head_ptr = (self.head_ptr - 1) % self.capacity
+        self.body[envs, self.head_ptr] = heads
+        self.lengths += 1
+        self.occupancy[envs[inside], y[inside], x[inside]] = True
+
+        rewards = np.zeros(self.n_envs, dtype=np.int64)
+        dones = collision | (self.frame_iteration > 100 * self.lengths)
+        rewards[dones] = -10
+        scores = self.scores.copy()
+
+        alive = ~dones
+        eaten = alive & (x == self.foods[:, 0]) & (y == self.foods[:, 1])
+        rewards[eaten] = 10
+        self.scores[eaten] += 1
+        scores[eaten] += 1
+
+        moved = np.flatnonzero(alive & ~eaten)
+        tail_ptr = (self.head_ptr[moved] + self.lengths[moved] - 1) % self.capacity
+        tails = self.body[moved, tail_ptr]
+        self.occupancy[moved, tails[:, 1], tails[:, 0]] = False
+        self.lengths[moved] -= 1
+
+        self._place_food(np.flatnonzero(eaten))
+        self.reset(dones)
+        return rewards, dones, scores
@@ -0,0 +1,26 @@
+import numpy as np
+from snake_RL.snake import SnakeGameAI
+from snake_RL.features import game_state, extract_states, game_arrays
+
+N_GAMES = 16
+N_STEPS = 300
+
+
+def test_extract_states_matches_game_state():
+    # boards driven by random moves, game over states included
+    rng = np.random.default_rng(0)
+    games = [SnakeGameAI(headless=True, seed=i) for i in range(N_GAMES)]
+    moves = np.eye(3, dtype=int)[rng.choice(3, (N_STEPS, N_GAMES), p=[0.8, 0.1, 0.1])].tolist()
+    game_overs = 0
+    for step_moves in moves:
+        dones = [game.play_step(move)[1] for game, move in zip(games, step_moves)]
+
+        expected = np.array([game_state(game) for game in games], dtype=np.float32)
+        actual = extract_states(*game_arrays(games))
+        np.testing.assert_array_equal(actual, expected)
+
+        for game, done in zip(games, dones):
+            if done:
+                game_overs += 1
+                game.reset()
+    assert game_overs > 0
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+import torch
+from rl_core.model import Linear_QNet, QTrainer
+
+GAMMA = 0.9
+N_SAMPLES = 1000
+
+
+def loop_target(model, state, action, reward, next_state, done):
+    # the per-sample loop QTrainer.train_step used before it was batched
+    state = torch.tensor(state, dtype=torch.float)
+    next_state = torch.tensor(next_state, dtype=torch.float)
+    action = torch.tensor(action, dtype=torch.long)
+    reward = torch.tensor(reward, dtype=torch.float)
+    with torch.no_grad():
+        pred = model(state)
+        target = pred.clone()
+        for idx in range(len(done)):
+            q_new = reward[idx]
+            if not done[idx]:
+                q_new = reward[idx] + GAMMA * torch.max(model(next_state[idx]))
+            target[idx][torch.argmax(action[idx]).item()] = q_new
+    return target
+
+
+@pytest.fixture
+def batch():
+    rng = np.random.default_rng(0)
+    states = rng.integers(0, 2, (N_SAMPLES, 13))
+    actions = np.eye(3, dtype=int)[rng.integers(0, 3, N_SAMPLES)]
+    rewards = rng.choice([-10, 0, 10], N_SAMPLES)
+    next_states = rng.integers(0, 2, (N_SAMPLES, 13))
+    dones = rng.random(N_SAMPLES) < 0.5
+    return states, actions, rewards, next_states, dones
+
+
+@pytest.fixture
+def trainer():
+    torch.manual_seed(0)
+    return QTrainer(Linear_QNet(13, 256, 3), lr=0.001, gamma=GAMMA)
+
+
+@pytest.mark.parametrize('done', [True, False])
+def test_single_transition_matches_loop(trainer, batch, done):
+    # the per-step train_short_memory call
+    states, actions, rewards, next_states, dones = batch
+    i = int(np.argmax(dones == done))
+    expected = loop_target(trainer.model, states[i:i + 1], actions[i:i + 1], rewards[i:i + 1],
+                           next_states[i:i + 1], dones[i:i + 1])
+    _, target, _, _ = trainer._target(states[i], actions[i].tolist(), int(rewards[i]), next_states[i], bool(dones[i]))
+    assert torch.equal(target, expected)
+
+
+def test_batch_matches_loop(trainer, batch):
+    states, actions, rewards, next_states, dones = batch
+    assert dones.any() and not dones.all()
+    expected = loop_target(trainer.model, *batch)
+    _, target, _, _ = trainer._target(*batch)
+    # the batched matmul may round differently from one sample at a time
+    torch.testing.assert_close(target, expected, rtol=0, atol=1e-5)